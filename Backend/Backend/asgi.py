@@ -7,6 +7,7 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
+import atexit
 import os
 
 from django.core.asgi import get_asgi_application
@@ -14,3 +15,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Backend.settings')
 
 application = get_asgi_application()
+
+if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    # uvicorn has no hook like gunicorn's child_exit, so each worker drops
+    # its own live series when it exits
+    from prometheus_client import multiprocess
+
+    atexit.register(multiprocess.mark_process_dead, os.getpid())
@@ -22,6 +22,36 @@ SECRET_KEY = env("SECRET_KEY")
 # OpenAI API Key for receipt validation
 OPENAI_API_KEY = env("OPENAI_API_KEY", default="")
 
+# Threads used by the async AI views for OCR / PDF work
+AI_BLOCKING_WORKERS = env.int("AI_BLOCKING_WORKERS", default=4)
+
+# Also run the OpenAI PO extraction when a proforma is uploaded, not only
+# its text extraction, so approve just renders the PDF. Costs one OpenAI
+# call per upload, including requests that end up rejected.
+PROFORMA_AI_PREEXTRACT = env.bool("PROFORMA_AI_PREEXTRACT", default=False)
+
+# Receipt / proforma images (core.extraction): larger images are refused
+# before decoding; the rest are reduced so their long side is at most
+# OCR_MAX_IMAGE_SIDE pixels for OCR (a 12 MP photo decodes at half size)
+MAX_IMAGE_PIXELS = env.int("MAX_IMAGE_PIXELS", default=50_000_000)
+OCR_MAX_IMAGE_SIDE = env.int("OCR_MAX_IMAGE_SIDE", default=2000)
+# Threads OCRing the pages of one multi-page receipt concurrently, and the
+# most images that may be uploaded together as one receipt
+OCR_WORKERS = env.int("OCR_WORKERS", default=4)
+RECEIPT_MAX_IMAGES = env.int("RECEIPT_MAX_IMAGES", default=10)
+
+# Text extraction runs in a throwaway process (core.sandbox) killed after
+# EXTRACTION_TIMEOUT seconds, with CPU-time and address-space limits.
+# Documents over MAX_DOCUMENT_PAGES pages (PDF pages / TIFF frames) are refused.
+EXTRACTION_SANDBOX = env.bool("EXTRACTION_SANDBOX", default=True)
+EXTRACTION_TIMEOUT = env.int("EXTRACTION_TIMEOUT", default=60)
+EXTRACTION_CPU_SECONDS = env.int("EXTRACTION_CPU_SECONDS", default=60)
+EXTRACTION_MEMORY_MB = env.int("EXTRACTION_MEMORY_MB", default=1536)
+MAX_DOCUMENT_PAGES = env.int("MAX_DOCUMENT_PAGES", default=50)
+# PDF text engine (core.extraction.ENGINES): 'auto' uses PyPDF2 and keeps
+# pdfplumber for PDFs with tables or where PyPDF2 finds no text
+PDF_TEXT_ENGINE = env.str("PDF_TEXT_ENGINE", default="auto")
+
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = env("DEBUG")
 
@@ -39,6 +69,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'django_extensions',
@@ -56,7 +87,9 @@ INSTALLED_APPS += CUSTOMER_APPS
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # For serving static files
+    'core.middleware.StaticFilesMiddleware',  # WhiteNoise static files, async-capable
+    'core.middleware.RequestTimingMiddleware',  # latency / query accounting
+    'core.middleware.ProfilingMiddleware',  # opt-in, token-triggered profiling
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware', # corsheaders
     'django.middleware.common.CommonMiddleware',
@@ -64,6 +97,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReadYourWritesMiddleware',  # replica read-your-writes window
 ]
 
 ROOT_URLCONF = 'Backend.urls'
@@ -98,10 +132,50 @@ DATABASES = {
         'USER':     env("PROD_DB_USER"),
         'PASSWORD': env("PROD_DB_PASSWORD"),
         'HOST':     env("PROD_DB_HOST"),
-        'PORT':     env("PROD_DB_PORT")
+        'PORT':     env("PROD_DB_PORT"),
+        # Keep each worker thread's connection open between requests and
+        # check it is still alive before reusing it
+        'CONN_MAX_AGE': env.int("DB_CONN_MAX_AGE", default=60),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Optional read replica for list/export traffic (core.db_router). Unset
+# settings fall back to the primary's; locally a second database on the same
+# server works (REPLICA_DB_NAME=... and migrate --database replica).
+if env("REPLICA_DB_HOST", default="") or env("REPLICA_DB_NAME", default=""):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME':     env("REPLICA_DB_NAME", default=DATABASES['default']['NAME']),
+        'USER':     env("REPLICA_DB_USER", default=DATABASES['default']['USER']),
+        'PASSWORD': env("REPLICA_DB_PASSWORD", default=DATABASES['default']['PASSWORD']),
+        'HOST':     env("REPLICA_DB_HOST", default=DATABASES['default']['HOST']),
+        'PORT':     env("REPLICA_DB_PORT", default=DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.db_router.ReadReplicaRouter']
+
+# Seconds a user's replica-eligible reads stay on the primary after they write
+READ_YOUR_WRITES_WINDOW = env.int("READ_YOUR_WRITES_WINDOW", default=5)
+
+# Cache
+# Defaults to a per-process local memory cache; point CACHE_URL at redis or
+# memcached (redis://host:6379/0) to share entries across workers. With
+# locmem, the invalidations below only reach the worker that made the
+# change: every other process keeps its entry until the timeout expires.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Seconds a resolved Manager/StaffMember/FinanceOfficer profile stays cached
+ROLE_PROFILE_CACHE_TIMEOUT = env.int('ROLE_PROFILE_CACHE_TIMEOUT', default=300)
+
+# Seconds a token user's is_active/user_type stays cached; bounds how long a
+# disabled account can keep using an unexpired access token (in every other
+# worker process, when the cache is not shared)
+TOKEN_USER_STATUS_CACHE_TIMEOUT = env.int('TOKEN_USER_STATUS_CACHE_TIMEOUT', default=30)
+
 REST_FRAMEWORK = {
     # Use Django's standard `django.contrib.auth` permissions,
     # or allow read-only access for unauthenticated users.
@@ -109,14 +183,54 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_RENDERER_CLASSES': (
         'rest_framework.renderers.JSONRenderer',
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.OptionalPageNumberPagination",
+    "PAGE_SIZE": 20,
 }
 
+# Server-Sent Events: keep-alive interval and max stream lifetime (seconds).
+# Each open stream holds a worker thread, so run gunicorn with gthread workers
+# (SERVER_WORKER_CLASS).
+SSE_HEARTBEAT_INTERVAL = env.int('SSE_HEARTBEAT_INTERVAL', default=15)
+SSE_MAX_DURATION = env.int('SSE_MAX_DURATION', default=300)
+
+# Rows fetched per server-side cursor round trip by the streaming export
+EXPORT_CHUNK_SIZE = env.int('EXPORT_CHUNK_SIZE', default=2000)
+
+# Bearer token required to scrape /metrics. Without one, /metrics is only
+# served when DEBUG is on (it lists endpoints and their traffic, and shares
+# the public port). Set PROMETHEUS_MULTIPROC_DIR in the process environment
+# (not here) to aggregate metrics across gunicorn workers.
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+
+# RequestTimingMiddleware: requests slower than this (ms) or issuing at least
+# this many queries are logged with their most repeated SQL; the rolling
+# per-endpoint window keeps this many samples per worker.
+SLOW_REQUEST_THRESHOLD_MS = env.int('SLOW_REQUEST_THRESHOLD_MS', default=1000)
+SLOW_REQUEST_QUERY_THRESHOLD = env.int('SLOW_REQUEST_QUERY_THRESHOLD', default=50)
+REQUEST_STATS_WINDOW = env.int('REQUEST_STATS_WINDOW', default=500)
+
+# Opt-in request profiling (manage.py profile_token): token lifetime in
+# seconds and the sampling profiler's interval in milliseconds
+PROFILING_TOKEN_MAX_AGE = env.int('PROFILING_TOKEN_MAX_AGE', default=3600)
+PROFILING_SAMPLE_INTERVAL_MS = env.int('PROFILING_SAMPLE_INTERVAL_MS', default=5)
+
+# Startup budget checked by `manage.py import_profile` (django.setup() plus URL
+# loading in a fresh interpreter). Modules listed in LAZY_IMPORT_MODULES are
+# heavy and must only be imported by the code paths that use them.
+STARTUP_TIME_BUDGET_MS = env.int('STARTUP_TIME_BUDGET_MS', default=1500)
+STARTUP_RSS_BUDGET_MB = env.int('STARTUP_RSS_BUDGET_MB', default=90)
+LAZY_IMPORT_MODULES = ['openai', 'pdfplumber', 'PIL', 'pytesseract', 'reportlab', 'numpy']
+
+# gunicorn worker model (see gunicorn.conf.py): 'gthread' or 'sync'
+SERVER_WORKER_CLASS = env('SERVER_WORKER_CLASS', default='gthread')
+SERVER_THREADS = env.int('SERVER_THREADS', default=8)
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Procure-to-Pay API',
     'DESCRIPTION': 'API documentation for purchase requests, approvals and finance workflows.',
@@ -4,6 +4,8 @@ from django.urls import path, include
 # import django settings
 from django.conf import settings
 from django.conf.urls.static import static
+from core.metrics import metrics_view
+from core.views import request_stats, healthz, readyz
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularSwaggerView,
@@ -12,9 +14,15 @@ from drf_spectacular.views import (
 
 
 urlpatterns = [
+    path('dashboard/request-stats/', admin.site.admin_view(request_stats), name='request-stats'),
     path('dashboard/', admin.site.urls),
     path('api/accounts/', include('accounts.urls')),
     path('api/', include('core.urls')),
+    # Prometheus scrape endpoint
+    path('metrics', metrics_view, name='metrics'),
+    # Liveness / readiness probes
+    path('healthz', healthz, name='healthz'),
+    path('readyz', readyz, name='readyz'),
     # OpenAPI schema
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
 
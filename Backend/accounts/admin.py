@@ -1,6 +1,7 @@
 from typing import Any
 from django.contrib import admin
 from accounts.models import User
+from accounts.authentication import invalidate_user_status
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from accounts.forms import UserAdminChangeForm, UserAdminCreationForm
 # groups
@@ -74,10 +75,17 @@ class UserAdmin(BaseUserAdmin):
     actions = ['disable_user', 'enable_user']
 
     def disable_user(self, request, queryset):
+        user_ids = list(queryset.values_list('pk', flat=True))
         queryset.update(is_active=False)
+        # update() skips post_save, so drop the cached token status here
+        for user_id in user_ids:
+            invalidate_user_status(user_id)
 
     def enable_user(self, request, queryset):
+        user_ids = list(queryset.values_list('pk', flat=True))
         queryset.update(is_active=True)
+        for user_id in user_ids:
+            invalidate_user_status(user_id)
 
     disable_user.short_description = "Disable selected users"
     enable_user.short_description = "Enable selected users"
@@ -0,0 +1,110 @@
+"""
+JWT authentication without a per-request User query.
+
+The access token already carries the claims the API needs (see
+CustomTokenObtainPairSerializer.get_token), so requests are authenticated
+into a ClaimsUser built from them. The only database read is a small
+(is_active, user_type) lookup that is cached for a few seconds, which keeps
+disabled users locked out and role changes effective without waiting for
+the token to expire. Saving the user drops the entry, but only from the
+cache the saving process uses: unless CACHE_URL points every worker at a
+shared cache, other workers honour the old status for up to
+TOKEN_USER_STATUS_CACHE_TIMEOUT.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from drf_spectacular.extensions import OpenApiAuthenticationExtension
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from accounts.models import User
+
+
+def user_status_cache_key(user_id):
+    return f"user-status:{user_id}"
+
+
+def invalidate_user_status(user_id):
+    cache.delete(user_status_cache_key(user_id))
+
+
+def get_user_status(user_id):
+    """Return (is_active, user_type) for user_id, or None if the user is gone."""
+    key = user_status_cache_key(user_id)
+    status = cache.get(key)
+    if status is None:
+        status = User.objects.filter(pk=user_id).values_list('is_active', 'user_type').first()
+        if status is None:
+            return None
+        cache.set(key, tuple(status), getattr(settings, 'TOKEN_USER_STATUS_CACHE_TIMEOUT', 30))
+    return status
+
+
+class ClaimsUser(TokenUser):
+    """
+    Token-backed stand-in for accounts.User.
+
+    Exposes the identity and role claims needed by permissions, role-profile
+    lookups and serializer defaults. Code that genuinely needs the model
+    (e.g. to write to it) can use `instance`, which loads it once.
+    """
+
+    def __init__(self, token, user_type):
+        super().__init__(token)
+        self.user_type = user_type
+
+    is_active = True
+
+    @cached_property
+    def instance(self) -> User:
+        return User.objects.get(pk=self.id)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        status = get_user_status(user_id)
+        if status is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        is_active, user_type = status
+        if not is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return ClaimsUser(validated_token, user_type)
+
+
+class QueryParamJWTAuthentication(StatelessJWTAuthentication):
+    """
+    Reads the access token from `?token=`. Only for endpoints consumed by
+    EventSource, which cannot send an Authorization header.
+    """
+
+    def authenticate(self, request):
+        raw_token = request.query_params.get('token')
+        if not raw_token:
+            return None
+        validated_token = self.get_validated_token(raw_token.encode())
+        return self.get_user(validated_token), validated_token
+
+
+class StatelessJWTScheme(SimpleJWTScheme):
+    """OpenAPI security scheme: same header token as simplejwt's own"""
+    target_class = StatelessJWTAuthentication
+
+
+class QueryParamJWTScheme(OpenApiAuthenticationExtension):
+    target_class = QueryParamJWTAuthentication
+    name = 'jwtQueryAuth'
+
+    def get_security_definition(self, auto_schema):
+        return {'type': 'apiKey', 'in': 'query', 'name': 'token'}
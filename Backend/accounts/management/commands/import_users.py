@@ -0,0 +1,123 @@
+import csv
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.models import User
+from accounts.profiles import PROFILE_MODELS
+
+
+def _hash(password):
+    # An empty password gets an unusable hash instead of hashing ''
+    return make_password(password or None)
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import users from a CSV file with the columns "
+        "username,email,full_name,user_type[,password,phone_number,address]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help='Path to the CSV file to import')
+        parser.add_argument('--batch-size', type=int, default=500, help='Users inserted per transaction')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Processes used to hash passwords; hashing dominates import time',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pool = ProcessPoolExecutor(options['workers']) if options['workers'] > 1 else None
+        imported = skipped = rows = 0
+        started = time.perf_counter()
+
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8') as fh:
+                reader = csv.DictReader(fh)
+                missing = {'username', 'email', 'full_name', 'user_type'} - set(reader.fieldnames or [])
+                if missing:
+                    raise CommandError(f"CSV is missing columns: {', '.join(sorted(missing))}")
+
+                while True:
+                    batch = list(islice(reader, batch_size))
+                    if not batch:
+                        break
+                    rows += len(batch)
+                    created, rejected = self._import_batch(batch, pool)
+                    imported += created
+                    skipped += rejected
+                    if options['verbosity'] > 1:
+                        elapsed = time.perf_counter() - started
+                        self.stdout.write(f"{rows} rows read, {imported} imported ({rows / elapsed:.0f} rows/s)")
+        finally:
+            if pool:
+                pool.shutdown()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} users, skipped {skipped}, from {rows} rows "
+            f"in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.0f} rows/s)"
+        ))
+
+    def _import_batch(self, batch, pool):
+        valid = []
+        for row in batch:
+            user_type = (row.get('user_type') or '').strip().lower()
+            if user_type not in PROFILE_MODELS or not row.get('username') or not row.get('email'):
+                self.stderr.write(f"Skipping invalid row for username={row.get('username')!r}")
+                continue
+            row['user_type'] = user_type
+            # Normalised before the duplicate checks, so they compare what is stored
+            row['email'] = User.objects.normalize_email(row['email'])
+            row['phone_number'] = row.get('phone_number') or None
+            valid.append(row)
+
+        # username, email and phone_number are all unique: a clash with an
+        # existing user or an earlier row of the batch would abort the insert
+        taken = {
+            field: set(
+                User.objects.filter(**{f'{field}__in': [r[field] for r in valid if r[field]]})
+                .values_list(field, flat=True)
+            )
+            for field in ('username', 'email', 'phone_number')
+        }
+        rows = []
+        for row in valid:
+            duplicate = next((field for field in taken if row[field] and row[field] in taken[field]), None)
+            if duplicate:
+                self.stderr.write(f"Skipping username={row['username']!r}: {duplicate} {row[duplicate]!r} is already taken")
+                continue
+            for field in taken:
+                if row[field]:
+                    taken[field].add(row[field])
+            rows.append(row)
+
+        passwords = [row.get('password') for row in rows]
+        hashes = list(pool.map(_hash, passwords, chunksize=16)) if pool else [_hash(p) for p in passwords]
+
+        users = [
+            User(
+                username=row['username'],
+                email=row['email'],
+                full_name=row['full_name'],
+                user_type=row['user_type'],
+                phone_number=row['phone_number'],
+                address=row.get('address') or None,
+                password=password,
+            )
+            for row, password in zip(rows, hashes)
+        ]
+
+        # bulk_create skips post_save, so role profiles are created here too
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            for user_type, model in PROFILE_MODELS.items():
+                model.objects.bulk_create([model(user=user) for user in users if user.user_type == user_type])
+        return len(users), len(batch) - len(users)
@@ -8,7 +8,6 @@ from django.contrib.auth.models import BaseUserManager, AbstractBaseUser, Permis
 from django.utils.translation import gettext_lazy as _
 from django.db.models import Q
 from django.utils import timezone
-from PIL import Image
 
 
 class UserManager(BaseUserManager):
@@ -0,0 +1,67 @@
+"""
+Request-scoped resolver for the caller's role profile.
+
+A user has exactly one of StaffMember / Manager / FinanceOfficer depending
+on `user_type`. The profile is loaded at most once per request (memoised on
+the request) and at most once per cache timeout across requests (keyed by
+user id). accounts.signals drops the cache entry whenever a profile or its
+user changes; that reaches other worker processes only through a shared
+cache (CACHE_URL), with the default locmem cache they keep their entry for
+up to ROLE_PROFILE_CACHE_TIMEOUT.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from accounts.models import User, Manager, StaffMember, FinanceOfficer
+
+PROFILE_MODELS = {
+    User.STAFF: StaffMember,
+    User.MANAGEMENT: Manager,
+    User.FINANCE: FinanceOfficer,
+}
+
+_MISSING = object()
+
+
+def profile_cache_key(user_id):
+    return f"role-profile:{user_id}"
+
+
+def invalidate_role_profile(user_id):
+    cache.delete(profile_cache_key(user_id))
+
+
+def _load_profile(user):
+    model = PROFILE_MODELS.get(user.user_type)
+    if model is None:
+        return None
+
+    key = profile_cache_key(user.pk)
+    profile = cache.get(key)
+    if isinstance(profile, model):
+        return profile
+
+    # Plain row without the related user so the cached pickle stays small
+    profile = model.objects.filter(user_id=user.pk).first()
+    if profile is not None:
+        cache.set(key, profile, getattr(settings, 'ROLE_PROFILE_CACHE_TIMEOUT', 300))
+    return profile
+
+
+def get_role_profile(request, model=None):
+    """
+    Return the authenticated caller's role profile, or None.
+    When `model` is given, None is also returned if the caller's profile is
+    of a different type (e.g. asking for a Manager on a staff request).
+    """
+    # Memoise on the underlying HttpRequest so DRF and Django views share it
+    http_request = getattr(request, '_request', request)
+    profile = getattr(http_request, '_role_profile', _MISSING)
+    if profile is _MISSING:
+        user = getattr(request, 'user', None)
+        profile = _load_profile(user) if user is not None and user.is_authenticated else None
+        http_request._role_profile = profile
+
+    if model is not None and not isinstance(profile, model):
+        return None
+    return profile
@@ -1,23 +1,36 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 from accounts.models import User, StaffMember, Manager, FinanceOfficer
+from accounts.authentication import invalidate_user_status
+from accounts.profiles import PROFILE_MODELS, invalidate_role_profile
+
 
 @receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
+def create_user_profile(sender, instance, created, update_fields=None, **kwargs):
+    profile_model = PROFILE_MODELS.get(instance.user_type)
+    if profile_model is None:
+        return
     if created:
-        if instance.user_type == User.STAFF:
-            StaffMember.objects.create(user=instance)
-        elif instance.user_type == User.MANAGEMENT:
-            Manager.objects.create(user=instance)
-        elif instance.user_type == User.FINANCE:
-            FinanceOfficer.objects.create(user=instance)
-            
-    all_users = User.objects.all()
-    for user in all_users:
-        if user.user_type == User.STAFF:
-            StaffMember.objects.get_or_create(user=user)
-        elif user.user_type == User.MANAGEMENT:
-            Manager.objects.get_or_create(user=user)
-        elif user.user_type == User.FINANCE:
-            FinanceOfficer.objects.get_or_create(user=user)
\ No newline at end of file
+        profile_model.objects.create(user=instance)
+    elif update_fields is None or 'user_type' in update_fields:
+        # user_type may have changed; partial saves such as last_login can't change it
+        profile_model.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=StaffMember)
+@receiver(post_save, sender=Manager)
+@receiver(post_save, sender=FinanceOfficer)
+@receiver(post_delete, sender=StaffMember)
+@receiver(post_delete, sender=Manager)
+@receiver(post_delete, sender=FinanceOfficer)
+def invalidate_cached_profile(sender, instance, **kwargs):
+    invalidate_role_profile(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user_state(sender, instance, **kwargs):
+    # user_type may have changed, which changes which profile applies
+    invalidate_role_profile(instance.pk)
+    invalidate_user_status(instance.pk)
@@ -1,3 +1,121 @@
+import os
+import tempfile
+import uuid
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from accounts.authentication import StatelessJWTAuthentication
+from accounts.models import User
+from accounts.profiles import PROFILE_MODELS
+from core.serializers import CustomTokenObtainPairSerializer
+
+
+def create_user(name, user_type=User.STAFF):
+    return User.objects.create_user(f'{name}@example.com', name, name.title(), password='p', user_type=user_type)
+
+
+def access_token(user):
+    return str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+
+
+class StatelessJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user('staff')
+        self.token = access_token(self.user)
+
+    def authenticate(self):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'JWT {self.token}')
+        return StatelessJWTAuthentication().authenticate(Request(request))
+
+    def test_warm_cache_needs_no_query(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate()
+        self.assertEqual(user.id, str(self.user.id))
+        self.assertEqual(user.user_type, User.STAFF)
+
+    def test_deactivation_rejects_the_next_request(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_role_change_applies_to_the_next_request(self):
+        self.authenticate()
+        self.user.user_type = User.MANAGEMENT
+        self.user.save()
+        user, _ = self.authenticate()
+        # The token still claims staff; the cached status wins
+        self.assertEqual(user.user_type, User.MANAGEMENT)
+
+    def test_deleted_user_is_rejected(self):
+        self.authenticate()
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+
+class QueryParamJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.token = access_token(create_user('staff'))
+
+    def test_accepted_on_event_streams(self):
+        # Authenticated, so the lookup runs and misses
+        response = self.client.get(f'/api/requests/{uuid.uuid4()}/events/', {'token': self.token})
+        self.assertEqual(response.status_code, 404)
+
+    def test_rejected_elsewhere(self):
+        for path in ('/api/requests/', '/api/requests/export/', '/api/requests/summary/'):
+            with self.subTest(path=path):
+                response = self.client.get(path, {'token': self.token})
+                self.assertEqual(response.status_code, 401)
+
+
+class ImportUsersTests(TestCase):
+    def import_csv(self, content):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as fh:
+            fh.write(content)
+        self.addCleanup(os.remove, fh.name)
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_users', fh.name, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_duplicates_are_skipped(self):
+        create_user('dave')
+        stdout, stderr = self.import_csv(
+            "username,email,full_name,user_type,password,phone_number\n"
+            "alice,alice@example.com,Alice,staff,pw,\n"
+            "bob,bob@example.com,Bob,Management,pw,555-0100\n"
+            "alice,alice2@example.com,Alice Again,staff,pw,\n"   # username of an earlier row
+            "alicia,alice@EXAMPLE.com,Alicia,staff,pw,\n"        # same email once normalised
+            "carol,carol@example.com,Carol,finance,pw,555-0100\n"  # phone of an earlier row
+            "dave,dave2@example.com,Dave,staff,pw,\n"            # existing user
+            "erin,erin@example.com,Erin,intern,pw,\n"            # unknown user_type
+        )
+
+        self.assertIn("Imported 2 users, skipped 5, from 7 rows", stdout)
+        self.assertEqual(stderr.count("Skipping"), 5)
+        self.assertEqual(
+            set(User.objects.exclude(username='dave').values_list('username', flat=True)), {'alice', 'bob'},
+        )
+        for user in User.objects.all():
+            profiles = [model for model in PROFILE_MODELS.values() if model.objects.filter(user=user).exists()]
+            self.assertEqual(profiles, [PROFILE_MODELS[user.user_type]], user.username)
 
-# Create your tests here.
+    def test_last_login_save_skips_profile_provisioning(self):
+        user = create_user('staff')
+        user.last_login = timezone.now()
+        # Just the UPDATE: no profile get_or_create for a partial save
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
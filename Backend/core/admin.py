@@ -1,3 +1,79 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
 
-# Register your models here.
+from core.models import ProfileRecord, PurchaseOrder, PurchaseOrderItem
+
+
+@admin.register(ProfileRecord)
+class ProfileRecordAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'method', 'path', 'mode', 'duration_ms', 'status_code', 'requested_by', 'download')
+    list_filter = ('mode', 'method', 'created_at')
+    search_fields = ('path', 'endpoint', 'requested_by')
+    readonly_fields = (
+        'method', 'path', 'endpoint', 'mode', 'requested_by', 'status_code',
+        'duration_ms', 'samples', 'created_at', 'download', 'formatted_report',
+    )
+    exclude = ('report', 'output')
+
+    # Records are only written by the profiling middleware
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<uuid:pk>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='core_profilerecord_download',
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request, pk):
+        record = get_object_or_404(ProfileRecord, pk=pk)
+        if not record.output:
+            raise Http404("Profile output is missing")
+        return FileResponse(record.output.open('rb'), as_attachment=True, filename=record.output.name.rsplit('/', 1)[-1])
+
+    @admin.display(description='Output')
+    def download(self, obj):
+        label = 'collapsed stacks' if obj.mode == ProfileRecord.SAMPLING else 'pstats'
+        return format_html('<a href="{}">Download {}</a>', reverse('admin:core_profilerecord_download', args=[obj.pk]), label)
+
+    @admin.display(description='Report')
+    def formatted_report(self, obj):
+        return format_html('<pre style="font-size: 12px">{}</pre>', obj.report)
+
+
+class PurchaseOrderItemInline(admin.TabularInline):
+    model = PurchaseOrderItem
+    extra = 0
+
+
+@admin.register(PurchaseOrder)
+class PurchaseOrderAdmin(admin.ModelAdmin):
+    list_display = ('purchase_request', 'vendor_name', 'total', 'created_at', 'updated_at')
+    search_fields = ('vendor_name', 'purchase_request__title')
+    list_select_related = ('purchase_request',)
+    raw_id_fields = ('purchase_request',)
+    inlines = [PurchaseOrderItemInline]
+    actions = ['regenerate_pdf']
+
+    @admin.action(description='Regenerate PO PDF from the stored data')
+    def regenerate_pdf(self, request, queryset):
+        from core.services import POGenerationService
+
+        po_service = POGenerationService()
+        regenerated = 0
+        for order in queryset.select_related('purchase_request'):
+            result = po_service.regenerate_purchase_order(order.purchase_request)
+            if result["success"]:
+                regenerated += 1
+            else:
+                self.message_user(request, f"{order}: {result['error']}", messages.ERROR)
+        self.message_user(request, f"Regenerated {regenerated} purchase order PDF(s)")
@@ -0,0 +1,159 @@
+"""
+Native async versions of the AI-bound purchase request actions.
+
+DRF views are sync-only, so under ASGI every OpenAI call in approve /
+submit-receipt would pin a worker thread for its full duration. These
+views await the async OpenAI client on the event loop instead and push
+OCR / PDF work to the blocking executor in core.services, so one process
+can keep many LLM calls in flight. Responses match the DRF actions.
+"""
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from accounts.authentication import StatelessJWTAuthentication
+from accounts.models import User, Manager, StaffMember
+from accounts.profiles import get_role_profile
+from core import events, metrics, transitions
+from core.models import PurchaseRequest
+from core.serializers import SubmitReceiptSerializer
+
+
+def _error(message, status_code):
+    return JsonResponse({"errorMessage": message, "status_code": status_code}, status=status_code)
+
+
+async def _authorize(request, user_type, profile_model):
+    """
+    Authenticate the JWT and check the caller's role.
+    Returns (profile, None) on success or (None, error response).
+    """
+    try:
+        result = await sync_to_async(StatelessJWTAuthentication().authenticate)(request)
+    except APIException as e:
+        return None, _error(str(e.detail), e.status_code)
+    if result is None:
+        return None, _error("Authentication credentials were not provided.", status.HTTP_401_UNAUTHORIZED)
+
+    request.user = result[0]
+    if request.user.user_type != user_type:
+        return None, _error("You are not allow the view or perform this action", status.HTTP_403_FORBIDDEN)
+    profile = await sync_to_async(get_role_profile)(request, profile_model)
+    if profile is None:
+        return None, _error("You are not allow the view or perform this action", status.HTTP_403_FORBIDDEN)
+    return profile, None
+
+
+@csrf_exempt
+@require_http_methods(["PATCH"])
+@metrics.timed('view.async_approve')
+async def approve_purchase_request(request, id):
+    manager, error = await _authorize(request, User.MANAGEMENT, Manager)
+    if error:
+        return error
+
+    approved = await sync_to_async(transitions.transition_one)(
+        id, PurchaseRequest.PENDING, PurchaseRequest.APPROVED, manager
+    )
+    if not approved:
+        current = await PurchaseRequest.objects.filter(id=id).values_list('status', flat=True).afirst()
+        if current is None:
+            return _error("Purchase request not found", status.HTTP_404_NOT_FOUND)
+        return _error(f"Purchase request is already {current}", status.HTTP_409_CONFLICT)
+
+    pr = await PurchaseRequest.objects.aget(id=id)
+
+    # Automatically generate Purchase Order
+    try:
+        from core.services import POGenerationService
+
+        po_result = await POGenerationService().agenerate_purchase_order(pr)
+        if po_result["success"]:
+            po_message = f"Purchase request approved and PO generated: {po_result['po_file']}"
+        else:
+            po_message = f"Purchase request approved. PO generation note: {po_result.get('error', 'Unknown error')}"
+    except Exception as e:
+        po_message = f"Purchase request approved. PO generation failed: {str(e)}"
+        po_result = {"success": False, "error": str(e)}
+
+    return JsonResponse({
+        "successMessage": po_message,
+        "status_code": status.HTTP_200_OK,
+        "po_generated": po_result.get("success", False),
+        "po_file": po_result.get("po_file"),
+        "po_data": po_result.get("extracted_data")
+    }, status=status.HTTP_200_OK)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@metrics.timed('view.async_submit_receipt')
+async def submit_receipt(request, id):
+    _, error = await _authorize(request, User.STAFF, StaffMember)
+    if error:
+        return error
+
+    pr = await PurchaseRequest.objects.filter(id=id).afirst()
+    if pr is None:
+        return _error("Purchase request not found", status.HTTP_404_NOT_FOUND)
+    if pr.status != PurchaseRequest.APPROVED:
+        return JsonResponse({"detail": "You can only submit a receipt after approval"}, status=400)
+
+    def save_receipt():
+        # Multipart parsing and the file write are blocking
+        serializer = SubmitReceiptSerializer(instance=pr, data=request.FILES, partial=True)
+        if not serializer.is_valid():
+            return serializer.errors
+        with metrics.span('db.save_receipt'):
+            serializer.save()
+        return None
+
+    errors = await sync_to_async(save_receipt)()
+    if errors:
+        return JsonResponse(errors, status=status.HTTP_400_BAD_REQUEST)
+
+    # Validate receipt with AI
+    try:
+        from core.services import ReceiptValidationService
+
+        validation_result = await ReceiptValidationService().avalidate_receipt(
+            receipt_file_path=pr.receipt.path,
+            purchase_request=pr
+        )
+        if validation_result.get('extraction_failure'):
+            # Unreadable (timeout, limits, bad file) rather than invalid
+            pr.receipt_validation_status = 'error'
+        else:
+            pr.receipt_validation_status = 'valid' if validation_result.get('is_valid') else 'invalid'
+        pr.receipt_validation_result = validation_result
+        with metrics.span('db.save_validation'):
+            await pr.asave(update_fields=['receipt_validation_status', 'receipt_validation_result'])
+        await sync_to_async(events.publish_for)(pr, pr.receipt_validation_status)
+
+        return JsonResponse({
+            "successMessage": "Receipt submitted and validated successfully",
+            "status_code": status.HTTP_200_OK,
+            "validation_status": pr.receipt_validation_status,
+            "validation_result": validation_result
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        # If validation fails, still accept the receipt but mark as error
+        pr.receipt_validation_status = 'error'
+        pr.receipt_validation_result = {
+            "is_valid": False,
+            "error": str(e),
+            "summary": "Validation failed due to system error"
+        }
+        await pr.asave(update_fields=['receipt_validation_status', 'receipt_validation_result'])
+        await sync_to_async(events.publish_for)(pr, 'error', error=str(e))
+
+        return JsonResponse({
+            "successMessage": "Receipt submitted but validation failed",
+            "status_code": status.HTTP_200_OK,
+            "validation_status": "error",
+            "error": str(e)
+        }, status=status.HTTP_200_OK)
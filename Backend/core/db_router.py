@@ -0,0 +1,77 @@
+"""
+Read-replica routing.
+
+When a `replica` alias is configured (REPLICA_DB_HOST / REPLICA_DB_NAME),
+PurchaseRequestViewSet sends the reads of its list and export actions
+there; every write and every other read stays on `default`.
+
+Reads are routed per request through a context variable, so nothing
+outside those actions can land on a lagging replica by accident. After a
+user writes, their reads stay on the primary for READ_YOUR_WRITES_WINDOW
+seconds (tracked in the cache, so use a shared CACHE_URL when running
+several workers) so they see their own change.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA = 'replica'
+
+_read_alias = ContextVar('read_alias', default=None)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def sticky_key(user_id):
+    return f"db-sticky:{user_id}"
+
+
+def mark_write(user_id):
+    """Pin user_id's reads to the primary for the read-your-writes window"""
+    cache.set(sticky_key(user_id), True, settings.READ_YOUR_WRITES_WINDOW)
+
+
+def read_alias_for(user_id):
+    """Alias a replica-eligible read for this user should use"""
+    if not replica_configured():
+        return DEFAULT_DB_ALIAS
+    if user_id is not None and cache.get(sticky_key(user_id)):
+        return DEFAULT_DB_ALIAS
+    return REPLICA
+
+
+@contextmanager
+def read_scope():
+    """Confine route_reads() to the enclosed block (one request)"""
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def route_reads(alias):
+    _read_alias.set(alias)
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # None falls through to Django's default (the instance's db or default)
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # No opinion: a real replica is never migrated directly, but a second
+        # local database standing in for one can be (migrate --database replica)
+        return None
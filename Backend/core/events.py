@@ -0,0 +1,165 @@
+"""
+Purchase request progress events over Postgres LISTEN/NOTIFY.
+
+`publish` emits a NOTIFY once the current transaction commits, from any
+worker process. Each process runs one listener thread (`hub`) holding a
+LISTEN connection and fans notifications out to the SSE streams it serves,
+so no external broker is needed and idle streams cost no queries.
+
+Stages: extracted, validating, valid, invalid, error, po_ready, approved,
+rejected.
+"""
+import json
+import logging
+import queue
+import select
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'purchase_request_events'
+
+
+def publish(request_id, requester_id, stage, **data):
+    """Notify listeners about `stage` for a purchase request after commit."""
+    if connection.vendor != 'postgresql':
+        return
+    payload = json.dumps({
+        "request_id": str(request_id),
+        "requester_id": str(requester_id) if requester_id else None,
+        "stage": stage,
+        "data": data,
+        "at": timezone.now().isoformat(),
+    }, default=str)
+
+    def notify():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, payload])
+
+    transaction.on_commit(notify)
+
+
+def publish_for(purchase_request, stage, **data):
+    publish(purchase_request.id, purchase_request.created_by_id, stage, **data)
+
+
+class EventHub:
+    """Per-process LISTEN connection that fans events out to subscriber queues."""
+
+    def __init__(self, queue_size=100):
+        self._queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._listening = threading.Event()
+
+    def subscribe(self, timeout=5) -> queue.Queue:
+        """
+        Register a subscriber queue. Returns once the LISTEN is active (or
+        after `timeout` seconds), so every event committed from then on
+        reaches the queue.
+        """
+        subscriber = queue.Queue(maxsize=self._queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='pr-event-hub', daemon=True)
+                self._thread.start()
+        if connection.vendor == 'postgresql' and not self._listening.wait(timeout):
+            logger.warning("Purchase request event listener is not connected yet; events may be missed")
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _dispatch(self, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # Slow consumer; it will resync from the snapshot on reconnect
+                pass
+
+    def _listen(self):
+        # A dedicated connection: LISTEN state must outlive Django's request-scoped connections
+        conn = psycopg2.connect(**connections['default'].get_connection_params())
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            self._listening.set()
+            while True:
+                with self._lock:
+                    if not self._subscribers:
+                        # Cleared under the lock so a concurrent subscribe()
+                        # waits for the next LISTEN instead of this one
+                        self._listening.clear()
+                        return
+                if select.select([conn], [], [], 5) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    self._dispatch(conn.notifies.pop(0).payload)
+        finally:
+            self._listening.clear()
+            conn.close()
+
+    def _run(self):
+        while True:
+            try:
+                self._listen()
+                with self._lock:
+                    if not self._subscribers:
+                        self._thread = None
+                        return
+            except Exception:
+                logger.exception("Purchase request event listener failed; reconnecting")
+                time.sleep(1)
+
+
+hub = EventHub()
+
+
+def format_sse(event, stage=None):
+    stage = stage or event.get("stage", "message")
+    return f"event: {stage}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+def stream(subscriber, matches, snapshot=None, heartbeat=15, max_duration=300):
+    """
+    Yield SSE frames for events on `subscriber` (from `hub.subscribe()`)
+    accepted by `matches(event)`, and unsubscribe when done.
+
+    Subscribe before reading the snapshot: an event committed in between is
+    then sent after the snapshot instead of being lost. Ends after
+    `max_duration` seconds; EventSource clients reconnect on their own,
+    which bounds how long a worker thread is held.
+    """
+    deadline = time.monotonic() + max_duration
+    try:
+        yield "retry: 3000\n\n"
+        if snapshot is not None:
+            yield format_sse(snapshot, "snapshot")
+        while time.monotonic() < deadline:
+            try:
+                event = subscriber.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if matches(event):
+                yield format_sse(event)
+    finally:
+        hub.unsubscribe(subscriber)
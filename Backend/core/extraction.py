@@ -0,0 +1,485 @@
+"""
+Text extraction for receipts and proformas.
+
+extract_text() is the one entry point: it runs extract() in the sandbox,
+which picks an engine from ENGINES by file type and content:
+
+- `pypdf`: PyPDF2's plain text extraction, the fast path for text PDFs
+- `pdfplumber`: layout-aware extraction, used for PDFs with ruled tables,
+  and when PyPDF2 fails or finds (next to) no text
+- `tesseract`: OCR of images, see below
+
+Every document's time is recorded per engine and routing reason in
+p2p_extraction_duration_seconds, and its pages in p2p_extraction_pages_total,
+so the routing thresholds below can be tuned from production numbers.
+PDF_TEXT_ENGINE forces one PDF engine instead.
+
+extract_tables() parses the line items and pricing rows of a proforma's
+tables locally, so the PO extraction prompt only needs the rest.
+
+Phone photos of receipts are usually 12+ MP colour JPEGs, far more than
+tesseract needs. prepare_frames() opens an upload at OCR resolution
+instead: JPEGs are decoded straight to a reduced grayscale image with
+draft mode, others are reduced after decoding, then the page is deskewed
+and binarized against a local mean with NumPy. Images over MAX_IMAGE_PIXELS are refused before
+their pixels are decoded. Multi-page images (TIFF scans, or several
+photos combined by combine_images) are OCRed page by page in parallel.
+"""
+import os
+import re
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from core import metrics
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff'}
+
+# A PDF page with at least PDF_TABLE_MIN_RULES rectangles / line segments
+# in its content stream probably holds a ruled table, which pdfplumber
+# lays out far better. A PyPDF2 result under PDF_MIN_CHARS_PER_PAGE
+# characters per page is treated as a failed extraction.
+PDF_TABLE_MIN_RULES = 4
+PDF_MIN_CHARS_PER_PAGE = 20
+_RULE_OPERATOR = re.compile(rb'(?:-?[\d.]+\s+){4}re\b|(?:-?[\d.]+\s+){2}l\b')
+
+# Line-item table columns, recognised by their header cell. Tried in order,
+# so "Unit price" is not taken for the description and a "Description"
+# column wins over an "Item" (number) column.
+ITEM_COLUMNS = (
+    ('quantity', re.compile(r'\bqty\b|quantit|\bunits?\b(?!\s*(price|cost))', re.I)),
+    ('unit_price', re.compile(r'unit|price|rate', re.I)),
+    ('total', re.compile(r'total|amount', re.I)),
+    ('description', re.compile(r'desc', re.I)),
+    ('description', re.compile(r'item|product|particular|service|article', re.I)),
+)
+# Pricing rows ("Subtotal", "VAT 16%", "Grand total", ...), in or out of tables
+PRICING_LABELS = (
+    ('subtotal', re.compile(r'^sub[\s-]*total\b', re.I)),
+    ('tax', re.compile(r'^(tax|vat|gst|sales tax)\b', re.I)),
+    ('shipping', re.compile(r'^(shipping|freight|delivery|carriage)\b', re.I)),
+    ('total', re.compile(r'^(grand total|total|amount due|balance due)\b', re.I)),
+)
+_AMOUNT = re.compile(r'-?\d[\d,]*(?:\.\d+)?')
+# An amount ending a line, optionally followed by a currency code / symbol
+_LINE_AMOUNT = re.compile(r'(-?\d[\d,]*(?:\.\d+)?)\s*[A-Za-z$€£]{0,3}\s*$')
+
+# Skew angles (degrees) tried when straightening a page, and the width of
+# the thumbnail the angle is estimated on
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_STEP = 0.25
+DESKEW_SAMPLE_WIDTH = 800
+DESKEW_MAX_SAMPLES = 100_000
+# Ink is at least INK_CONTRAST grey levels darker than the mean of a box
+# INK_BLOCK_RATIO of the image's long side wide around it
+INK_CONTRAST = 12
+INK_BLOCK_RATIO = 0.01
+
+
+# Frames of multi-page documents are OCRed concurrently here
+_ocr_pool = ThreadPoolExecutor(max_workers=settings.OCR_WORKERS, thread_name_prefix='ocr')
+
+
+class ExtractionError(Exception):
+    """
+    Text could not be extracted from a document. `code` says why, so the
+    failure can be recorded on the request instead of a bare message.
+    """
+    code = 'failed'
+
+
+class DocumentTooLarge(ExtractionError):
+    code = 'too_large'
+
+
+class ExtractionTimeout(ExtractionError):
+    code = 'timeout'
+
+
+class ExtractionResourceLimit(ExtractionError):
+    code = 'resource_limit'
+
+
+FAILURES = {error.code: error for error in (ExtractionError, DocumentTooLarge, ExtractionTimeout, ExtractionResourceLimit)}
+
+# What extract() returns: the text, the engine that produced it, why that
+# engine was picked, the page count and the seconds taken (routing included)
+Extraction = namedtuple('Extraction', ['text', 'engine', 'reason', 'pages', 'seconds'])
+
+# Engine name -> function(file_path) returning (text, pages)
+ENGINES = {}
+
+
+def engine(name):
+    """Register the decorated function as extraction engine `name`"""
+    def register(func):
+        ENGINES[name] = func
+        return func
+    return register
+
+
+def _check_size(image):
+    width, height = image.size
+    if width * height > settings.MAX_IMAGE_PIXELS:
+        raise DocumentTooLarge(
+            f"Image is {width}x{height} ({width * height} pixels), "
+            f"over the {settings.MAX_IMAGE_PIXELS} pixel limit"
+        )
+
+
+def _check_pages(count):
+    if count > settings.MAX_DOCUMENT_PAGES:
+        raise DocumentTooLarge(f"Document has {count} pages, over the {settings.MAX_DOCUMENT_PAGES} page limit")
+
+
+def _ink(image):
+    """
+    Boolean array of 'ink' pixels: clearly darker than their neighbourhood.
+    A local mean rather than one global threshold copes with the shadows,
+    uneven lighting and dark table backgrounds of phone photos.
+    """
+    import numpy as np
+    from PIL import ImageFilter
+
+    radius = max(2, round(max(image.size) * INK_BLOCK_RATIO))
+    local_mean = np.asarray(image.filter(ImageFilter.BoxBlur(radius)), dtype=np.int16)
+    return np.asarray(image, dtype=np.int16) < local_mean - INK_CONTRAST
+
+
+def _skew_angle(image) -> float:
+    """
+    Estimate the text skew of a grayscale page: the angle whose shear makes
+    the row histogram of ink pixels the most peaked (text lines line up).
+    """
+    import numpy as np
+    from PIL import Image
+
+    scale = min(1.0, DESKEW_SAMPLE_WIDTH / image.width)
+    sample = image.resize((max(1, int(image.width * scale)), max(1, int(image.height * scale))), Image.Resampling.BILINEAR)
+    ys, xs = np.nonzero(_ink(sample))
+    if len(ys) < 100:
+        return 0.0
+    # Bound the per-angle arrays below on very dark pages
+    stride = max(1, len(ys) // DESKEW_MAX_SAMPLES)
+    ys, xs = ys[::stride].astype(np.float32), xs[::stride].astype(np.float32)
+    # Sheared rows can go negative by up to width * tan(max angle)
+    shift = sample.width * np.tan(np.radians(DESKEW_MAX_ANGLE)) + 1
+
+    angles = np.arange(-DESKEW_MAX_ANGLE, DESKEW_MAX_ANGLE + DESKEW_STEP / 2, DESKEW_STEP)
+    scores = []
+    for angle in angles:
+        rows = (ys - xs * np.float32(np.tan(np.radians(angle))) + shift).astype(np.int32)
+        profile = np.bincount(rows).astype(np.float64)
+        scores.append(np.square(np.diff(profile)).sum())
+    return float(angles[int(np.argmax(scores))])
+
+
+def preprocess(image):
+    """Grayscale, reduce, deskew and binarize an opened PIL image for OCR"""
+    import numpy as np
+    from PIL import Image, ImageOps
+
+    _check_size(image)
+    # Phone cameras store rotation in EXIF instead of rotating the pixels
+    image = ImageOps.exif_transpose(image)
+    image = image.convert('L')
+    if max(image.size) > settings.OCR_MAX_IMAGE_SIDE:
+        image.thumbnail((settings.OCR_MAX_IMAGE_SIDE, settings.OCR_MAX_IMAGE_SIDE), Image.Resampling.LANCZOS)
+
+    angle = _skew_angle(image)
+    # Black ink on white, everything else (paper, background) white
+    image = Image.fromarray(np.where(_ink(image), 0, 255).astype(np.uint8))
+    if abs(angle) >= DESKEW_STEP:
+        # Binarized first so the corners the rotation adds blend in
+        image = image.rotate(angle, resample=Image.Resampling.BILINEAR, expand=True, fillcolor=255)
+    return image
+
+
+def prepare_frames(file_path: str):
+    """
+    Yield every frame of an image file (the pages of a multi-page TIFF,
+    or the single frame of anything else) preprocessed for OCR, in order
+    """
+    from PIL import Image, ImageSequence
+
+    with Image.open(file_path) as image:
+        # Only the header has been read so far
+        _check_size(image)
+        if image.format == 'JPEG':
+            # Let the decoder scale by 1/2, 1/4 or 1/8 and skip colour
+            # conversion, instead of decoding every pixel and shrinking
+            factor = min(1.0, settings.OCR_MAX_IMAGE_SIDE / max(image.size))
+            image.draft('L', (int(image.width * factor), int(image.height * factor)))
+        _check_pages(getattr(image, 'n_frames', 1))
+        for frame in ImageSequence.Iterator(image):
+            with metrics.span('extract.preprocess'):
+                prepared = preprocess(frame)
+            yield prepared
+
+
+def _ocr(image) -> str:
+    import pytesseract
+
+    with metrics.span('extract.tesseract'):
+        return pytesseract.image_to_string(image)
+
+
+@engine('tesseract')
+def ocr_image(file_path: str):
+    """
+    OCR every frame of an image file. Frames are decoded and preprocessed
+    one at a time here and OCRed in parallel on the OCR pool (tesseract
+    runs as a subprocess, so threads are enough); pages join in order.
+    """
+    futures = [_ocr_pool.submit(_ocr, frame) for frame in prepare_frames(file_path)]
+    return "\n\n".join(future.result() for future in futures), len(futures)
+
+
+@engine('pdfplumber')
+def pdfplumber_text(file_path: str):
+    """Text of every page of a PDF, laid out by pdfplumber"""
+    import pdfplumber
+
+    with metrics.span('extract.pdfplumber'), pdfplumber.open(file_path) as pdf:
+        _check_pages(len(pdf.pages))
+        return "\n".join(page.extract_text() or "" for page in pdf.pages), len(pdf.pages)
+
+
+def _pdf_reader(file_path: str):
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(file_path)
+    _check_pages(len(reader.pages))
+    return reader
+
+
+def _pypdf_pages(reader) -> str:
+    with metrics.span('extract.pypdf'):
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+@engine('pypdf')
+def pypdf_text(file_path: str):
+    """Text of every page of a PDF via PyPDF2: no layout analysis, so fast"""
+    reader = _pdf_reader(file_path)
+    return _pypdf_pages(reader), len(reader.pages)
+
+
+def _ruled(page) -> bool:
+    """Whether a PyPDF2 page draws enough rules to hold a table"""
+    contents = page.get_contents()
+    if contents is None:
+        return False
+    return len(_RULE_OPERATOR.findall(contents.get_data())) >= PDF_TABLE_MIN_RULES
+
+
+def _route_pdf(file_path: str):
+    """
+    (engine, reason, text, pages) for a PDF: PyPDF2's text unless a page
+    looks tabular, or PyPDF2 fails or finds too little text, in which case
+    pdfplumber's
+    """
+    try:
+        reader = _pdf_reader(file_path)
+        if any(_ruled(page) for page in reader.pages):
+            reason = 'tables'
+        else:
+            text, pages = _pypdf_pages(reader), len(reader.pages)
+            if len(text.strip()) >= PDF_MIN_CHARS_PER_PAGE * pages:
+                return 'pypdf', 'text', text, pages
+            reason = 'sparse'
+    except (ExtractionError, MemoryError):
+        raise
+    except Exception:
+        # PyPDF2 is stricter about malformed files than pdfminer
+        reason = 'pypdf_failed'
+    text, pages = ENGINES['pdfplumber'](file_path)
+    return 'pdfplumber', reason, text, pages
+
+
+def extract(file_path: str) -> Extraction:
+    """Extract the text of a PDF or image with the engine that suits it"""
+    started = time.perf_counter()
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in IMAGE_EXTENSIONS:
+        name, reason = 'tesseract', 'image'
+        text, pages = ENGINES[name](file_path)
+    elif extension == '.pdf' and settings.PDF_TEXT_ENGINE != 'auto':
+        name, reason = settings.PDF_TEXT_ENGINE, 'forced'
+        text, pages = ENGINES[name](file_path)
+    elif extension == '.pdf':
+        name, reason, text, pages = _route_pdf(file_path)
+    else:
+        raise ExtractionError(f"Unsupported file format: {extension or 'no extension'}")
+    return Extraction(text, name, reason, pages, time.perf_counter() - started)
+
+
+def extract_text(file_path: str) -> str:
+    """
+    Text of a receipt / proforma file, extracted in the sandbox. Raises an
+    ExtractionError subclass when it can't be.
+    """
+    from core import sandbox
+
+    with metrics.span('extract.document'):
+        result = sandbox.run(extract, file_path)
+    metrics.EXTRACTION_DURATION.labels(result.engine, result.reason).observe(result.seconds)
+    metrics.EXTRACTION_PAGES.labels(result.engine).inc(result.pages)
+    return result.text
+
+
+def _cell(value) -> str:
+    # Postgres can't store NUL, which some PDFs produce, in JSON either
+    return " ".join((value or "").replace("\x00", "").split())
+
+
+def _amount(value: str):
+    """The last number in value ("$1,200.00" -> "1,200.00"), or None"""
+    amounts = _AMOUNT.findall(value)
+    return amounts[-1] if amounts else None
+
+
+def _pricing_row(cells):
+    """(key, amount) if table cells read like a pricing row, e.g. ["Subtotal", "", "1,000.00"]"""
+    cells = [cell for cell in cells if cell]
+    for key, label in PRICING_LABELS:
+        match = label.search(cells[0]) if cells else None
+        if match:
+            amount = _amount(" ".join(cells[1:]) or cells[0][match.end():])
+            return (key, amount) if amount else None
+    return None
+
+
+def _pricing_line(line: str):
+    """(key, amount) for a text line like "Total: $1,050.00" that ends in the amount"""
+    for key, label in PRICING_LABELS:
+        match = label.search(line)
+        if match:
+            amount = _LINE_AMOUNT.search(line, match.end())
+            return (key, amount.group(1)) if amount else None
+    return None
+
+
+def _item_columns(row):
+    """{field: column index} if row is a line-item table header, else None"""
+    columns = {}
+    for field, pattern in ITEM_COLUMNS:
+        if field in columns:
+            continue
+        for index, cell in enumerate(row):
+            if cell and index not in columns.values() and pattern.search(cell):
+                columns[field] = index
+                break
+    if 'description' in columns and len(columns) > 1:
+        return columns
+    return None
+
+
+def _parse_table(rows, items, pricing) -> bool:
+    """
+    Add the line items / pricing rows of one extracted table to items and
+    pricing. Returns whether the table held any.
+    """
+    columns, found = None, False
+    for row in rows:
+        cells = [_cell(cell) for cell in row]
+        if columns is None:
+            columns = _item_columns(cells)
+            if columns is not None:
+                continue
+        if columns is not None:
+            item = {field: cells[index] if index < len(cells) else '' for field, index in columns.items()}
+            numbers = {field: _amount(item.get(field, '')) for field in ('quantity', 'unit_price', 'total')}
+            # A quantity makes it an item even if it reads "Shipping" or "Tax ..."
+            if item['description'] and (numbers['quantity'] or (any(numbers.values()) and not _pricing_row(cells))):
+                items.append({
+                    "description": item['description'],
+                    **{field: number or "N/A" for field, number in numbers.items()},
+                })
+                found = True
+                continue
+        pricing_row = _pricing_row(cells)
+        if pricing_row:
+            pricing.setdefault(*pricing_row)
+            found = True
+    return found
+
+
+def _outside(bboxes):
+    """pdfplumber object filter dropping objects centred inside any bbox"""
+    def keep(obj):
+        x = (obj['x0'] + obj['x1']) / 2
+        y = (obj['top'] + obj['bottom']) / 2
+        return not any(x0 <= x <= x1 and top <= y <= bottom for x0, top, x1, bottom in bboxes)
+    return keep
+
+
+def parse_tables(file_path: str) -> dict:
+    """
+    Line items and pricing of a PDF proforma, from its tables:
+    {"items": [...], "pricing": {...}, "text": ...}. Items and pricing use
+    the keys and string values of the LLM extraction (missing amounts are
+    "N/A"); text is everything outside the tables they came from, which is
+    all the LLM still needs to see. Pricing lines outside tables
+    ("Total: 1,050.00") are picked up too.
+    """
+    import pdfplumber
+
+    items, pricing, texts = [], {}, []
+    with pdfplumber.open(file_path) as pdf:
+        _check_pages(len(pdf.pages))
+        for page in pdf.pages:
+            parsed = [table.bbox for table in page.find_tables() if _parse_table(table.extract(), items, pricing)]
+            texts.append((page.filter(_outside(parsed)) if parsed else page).extract_text() or "")
+    text = "\n".join(texts).replace("\x00", "")
+    for line in text.splitlines():
+        pricing_line = _pricing_line(line.strip())
+        if pricing_line:
+            pricing.setdefault(*pricing_line)
+    return {"items": items, "pricing": pricing, "text": text}
+
+
+def extract_tables(file_path: str) -> dict:
+    """
+    parse_tables() of a proforma, in the sandbox; {} for images, whose
+    tables would need OCR layout analysis
+    """
+    from core import sandbox
+
+    if os.path.splitext(file_path)[1].lower() != '.pdf':
+        return {}
+    try:
+        with metrics.span('extract.tables'):
+            return sandbox.run(parse_tables, file_path)
+    except ExtractionError as e:
+        if type(e) is not ExtractionError:
+            raise
+        # pdfminer couldn't parse the file; PyPDF2 may still get its text
+        return {}
+
+
+def combine_images(files, name: str):
+    """
+    Store several uploaded images (one receipt photographed in parts) as
+    one multi-page TIFF, so it is kept and OCRed as a single document.
+    Pages are written one at a time to bound memory.
+    """
+    import io
+
+    from django.core.files.base import ContentFile
+    from PIL import Image, ImageOps, TiffImagePlugin
+
+    buffer = io.BytesIO()
+    with TiffImagePlugin.AppendingTiffWriter(buffer, new=True) as tiff:
+        for upload in files:
+            upload.seek(0)
+            with Image.open(upload) as image:
+                _check_size(image)
+                page = ImageOps.exif_transpose(image)
+                if page.mode not in ('RGB', 'L'):
+                    page = page.convert('RGB')
+                page.save(tiff, format='TIFF', compression='jpeg', quality=90)
+                tiff.newFrame()
+    return ContentFile(buffer.getvalue(), name=name)
@@ -0,0 +1,101 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: the same work a web worker does before it can
+# serve its first request
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver()._populate()
+seconds = time.perf_counter() - started
+try:
+    # ru_maxrss survives exec on Linux and would report the parent's peak
+    # (e.g. a test runner's); VmHWM covers this interpreter only
+    with open('/proc/self/status') as status:
+        max_rss_kb = next(int(line.split()[1]) for line in status if line.startswith('VmHWM:'))
+except OSError:
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    "seconds": seconds,
+    "max_rss_kb": max_rss_kb,
+    "modules": sorted(sys.modules),
+}))
+"""
+
+
+def _run_probe(*python_options):
+    result = subprocess.run(
+        [sys.executable, *python_options, '-c', PROBE],
+        capture_output=True,
+        text=True,
+        cwd=settings.BASE_DIR,
+        env=os.environ.copy(),
+    )
+    if result.returncode != 0:
+        raise CommandError(f"Startup probe failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def _parse_importtime(stderr):
+    """(module, self_us, cumulative_us) rows from `python -X importtime` output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile the imports done by django.setup() plus URL loading and fail "
+        "if startup exceeds STARTUP_TIME_BUDGET_MS / STARTUP_RSS_BUDGET_MB or "
+        "eagerly imports a module listed in LAZY_IMPORT_MODULES"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help='Modules to list in the report (0 for none)')
+        parser.add_argument('--runs', type=int, default=3, help='Timed startups; the fastest counts against the budget')
+
+    def handle(self, *args, **options):
+        if options['top']:
+            _, stderr = _run_probe('-X', 'importtime')
+            rows = _parse_importtime(stderr)
+            self.stdout.write(f"Slowest imports by cumulative time (of {len(rows)}):")
+            for name, self_us, cumulative_us in sorted(rows, key=lambda row: -row[2])[:options['top']]:
+                self.stdout.write(f"  {cumulative_us / 1000:8.1f}ms  (self {self_us / 1000:6.1f}ms)  {name}")
+            self.stdout.write("Slowest imports by self time:")
+            for name, self_us, _ in sorted(rows, key=lambda row: -row[1])[:options['top']]:
+                self.stdout.write(f"  {self_us / 1000:8.1f}ms  {name}")
+
+        # -X importtime slows imports down, so time clean runs separately
+        runs = [_run_probe()[0] for _ in range(max(1, options['runs']))]
+        seconds = min(run['seconds'] for run in runs)
+        rss_mb = min(run['max_rss_kb'] for run in runs) / 1024
+        loaded = set(runs[0]['modules'])
+        eager = [name for name in settings.LAZY_IMPORT_MODULES if name in loaded]
+
+        self.stdout.write(
+            f"Startup: {seconds * 1000:.0f}ms (budget {settings.STARTUP_TIME_BUDGET_MS}ms), "
+            f"max RSS {rss_mb:.0f}MB (budget {settings.STARTUP_RSS_BUDGET_MB}MB), {len(loaded)} modules"
+        )
+
+        failures = []
+        if seconds * 1000 > settings.STARTUP_TIME_BUDGET_MS:
+            failures.append("startup time is over budget")
+        if rss_mb > settings.STARTUP_RSS_BUDGET_MB:
+            failures.append("startup memory is over budget")
+        if eager:
+            failures.append(f"imported at startup but should be lazy: {', '.join(eager)}")
+        if failures:
+            raise CommandError("; ".join(failures))
+        self.stdout.write(self.style.SUCCESS("Startup is within budget"))
@@ -0,0 +1,150 @@
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff'}
+
+# One image per fresh interpreter, so peak RSS belongs to that image alone.
+# `baseline` is what extract_text_from_image did before preprocessing.
+# Peak RSS comes from VmHWM: ru_maxrss survives exec, so it would include
+# this command's own peak.
+PROBE = """
+import json, resource, sys, time
+import django
+django.setup()
+import numpy, pytesseract
+from PIL import Image
+from core import extraction
+def peak_rss_kb():
+    with open('/proc/self/status') as status:
+        return next(int(line.split()[1]) for line in status if line.startswith('VmHWM'))
+mode, path, ocr = sys.argv[1], sys.argv[2], sys.argv[3] == '1'
+rss_before = peak_rss_kb()
+started = time.perf_counter()
+if mode == 'baseline':
+    image = Image.open(path)
+    image.load()
+    frames = [image]
+else:
+    frames = list(extraction.prepare_frames(path))
+prepared = time.perf_counter()
+text = ''.join(pytesseract.image_to_string(frame) for frame in frames) if ocr else ''
+print(json.dumps({
+    "prepare_s": prepared - started,
+    "ocr_s": time.perf_counter() - prepared,
+    "pixels": sum(frame.width * frame.height for frame in frames),
+    "rss_kb": peak_rss_kb() - rss_before,
+    "tesseract_rss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    "chars": len(text.strip()),
+}))
+"""
+
+MODES = ('baseline', 'preprocessed')
+
+
+def _synthetic_photo(path, rng):
+    """A 12 MP colour 'phone photo' of a slightly rotated receipt"""
+    from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+    receipt = Image.new('RGB', (1400, 2600), (246, 244, 236))
+    draw = ImageDraw.Draw(receipt)
+    font = ImageFont.load_default(size=44)
+    draw.text((420, 80), "ACME SUPPLIES LTD", fill=(20, 20, 20), font=font)
+    for line in range(30):
+        amount = rng.randint(100, 50000) / 100
+        draw.text((80, 220 + line * 70), f"Item {line + 1:02d} widget x{rng.randint(1, 9)}", fill=(30, 30, 30), font=font)
+        draw.text((1050, 220 + line * 70), f"{amount:8.2f}", fill=(30, 30, 30), font=font)
+    draw.text((80, 2400), "TOTAL", fill=(0, 0, 0), font=font)
+    receipt = receipt.rotate(rng.uniform(-4, 4), expand=True, fillcolor=(90, 80, 70), resample=Image.Resampling.BICUBIC)
+
+    photo = Image.new('RGB', (4032, 3024), (90, 80, 70))
+    scale = 2900 / receipt.height
+    receipt = receipt.resize((int(receipt.width * scale), 2900), Image.Resampling.BICUBIC)
+    photo.paste(receipt, ((photo.width - receipt.width) // 2, 62))
+    photo.filter(ImageFilter.GaussianBlur(1)).save(path, 'JPEG', quality=90)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare OCR latency and peak memory of receipt images with and without "
+        "the core.extraction preprocessing (draft decode, grayscale, deskew, binarize)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='Image files or directories (the corpus)')
+        parser.add_argument('--synthetic', type=int, default=5, help='Synthetic 12 MP photos to use when no paths are given')
+        parser.add_argument('--no-ocr', action='store_true', help='Only time decoding / preprocessing')
+        parser.add_argument('--random-seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        ocr = not options['no_ocr']
+        if ocr and shutil.which('tesseract') is None:
+            self.stderr.write("tesseract is not installed; timing decoding / preprocessing only")
+            ocr = False
+
+        workdir = None
+        images = self._corpus(options['paths'])
+        if not images:
+            workdir = tempfile.mkdtemp(prefix='ocr-benchmark-')
+            rng = random.Random(options['random_seed'])
+            for i in range(options['synthetic']):
+                images.append(os.path.join(workdir, f"receipt_{i}.jpg"))
+                _synthetic_photo(images[-1], rng)
+        if not images:
+            raise CommandError("No images to benchmark")
+
+        try:
+            results = {mode: [self._probe(mode, path, ocr) for path in images] for mode in MODES}
+        finally:
+            if workdir:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+        self.stdout.write(f"{len(images)} images, OCR {'on' if ocr else 'off'}, OCR_MAX_IMAGE_SIDE={settings.OCR_MAX_IMAGE_SIDE}")
+        self.stdout.write(f"{'mode':<14}{'prepare p50':>13}{'ocr p50':>10}{'total p50':>11}{'megapixels':>12}{'peak RSS':>10}{'tesseract RSS':>15}")
+        for mode, rows in results.items():
+            prepare = statistics.median(row['prepare_s'] for row in rows)
+            ocr_s = statistics.median(row['ocr_s'] for row in rows)
+            total = statistics.median(row['prepare_s'] + row['ocr_s'] for row in rows)
+            self.stdout.write(
+                f"{mode:<14}{prepare * 1000:>11.0f}ms{ocr_s * 1000:>8.0f}ms{total * 1000:>9.0f}ms"
+                f"{statistics.median(row['pixels'] for row in rows) / 1e6:>12.1f}"
+                f"{max(row['rss_kb'] for row in rows) / 1024:>8.0f}MB"
+                f"{max(row['tesseract_rss_kb'] for row in rows) / 1024:>13.0f}MB"
+            )
+        if ocr:
+            for mode, rows in results.items():
+                self.stdout.write(f"{mode}: {sum(row['chars'] for row in rows)} characters recognised")
+
+    def _corpus(self, paths):
+        images = []
+        for path in paths:
+            if os.path.isdir(path):
+                images += sorted(
+                    os.path.join(path, name) for name in os.listdir(path)
+                    if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+                )
+            elif os.path.isfile(path):
+                images.append(path)
+            else:
+                raise CommandError(f"No such file or directory: {path}")
+        return images
+
+    def _probe(self, mode, path, ocr):
+        result = subprocess.run(
+            [sys.executable, '-c', PROBE, mode, path, '1' if ocr else '0'],
+            capture_output=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+            env=os.environ.copy(),
+        )
+        if result.returncode != 0:
+            raise CommandError(f"{mode} run on {path} failed:\n{result.stderr}")
+        return json.loads(result.stdout.strip().splitlines()[-1])
@@ -0,0 +1,66 @@
+import os
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import extraction
+
+PDF_ENGINES = ('pypdf', 'pdfplumber')
+
+
+class Command(BaseCommand):
+    help = (
+        "Time every PDF text engine on a corpus of PDFs and show which one "
+        "PDF_TEXT_ENGINE=auto routes each file to, to tune the routing thresholds"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='PDF files or directories (the corpus)')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per file and engine (the median is shown)')
+
+    def handle(self, *args, **options):
+        pdfs = self._corpus(options['paths'])
+        if not pdfs:
+            raise CommandError("No PDFs to benchmark")
+
+        self.stdout.write(f"{'file':<40}{'pages':>6}" + ''.join(f"{name:>14}{'chars':>8}" for name in PDF_ENGINES) + "  auto")
+        totals = {name: 0.0 for name in PDF_ENGINES}
+        for path in pdfs:
+            row, pages = '', 0
+            for name in PDF_ENGINES:
+                try:
+                    seconds, (text, pages) = self._time(name, path, options['repeat'])
+                except Exception as e:
+                    row += f"{type(e).__name__:>14}{'':>8}"
+                    continue
+                totals[name] += seconds
+                row += f"{seconds * 1000:>12.1f}ms{len(text.strip()):>8}"
+            try:
+                route = extraction.extract(path)
+                auto = f"{route.engine} ({route.reason})"
+            except Exception as e:
+                auto = f"failed ({type(e).__name__})"
+            self.stdout.write(f"{os.path.basename(path)[:39]:<40}{pages:>6}{row}  {auto}")
+        self.stdout.write("total: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in totals.items()))
+
+    def _time(self, name, path, repeat):
+        times = []
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            result = extraction.ENGINES[name](path)
+            times.append(time.perf_counter() - started)
+        return statistics.median(times), result
+
+    def _corpus(self, paths):
+        pdfs = []
+        for path in paths:
+            if os.path.isdir(path):
+                pdfs += sorted(
+                    os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith('.pdf')
+                )
+            elif os.path.isfile(path):
+                pdfs.append(path)
+            else:
+                raise CommandError(f"No such file or directory: {path}")
+        return pdfs
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from core import profiling
+from core.models import ProfileRecord
+
+
+class Command(BaseCommand):
+    help = "Mint a signed token that profiles the requests it is sent with"
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Staff (dashboard) user the token is issued to')
+        parser.add_argument(
+            '--mode',
+            choices=[mode for mode, _ in ProfileRecord.mode_choices],
+            default=ProfileRecord.SAMPLING,
+            help='sample: low-overhead stack sampling (default); cprofile: trace every call',
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f"User {options['username']} does not exist")
+        if not (user.is_active and user.is_staff):
+            raise CommandError(f"User {user.username} is not active staff")
+
+        token = profiling.mint_token(user, options['mode'])
+        self.stdout.write(token)
+        self.stderr.write(
+            f"Send it as the X-Profile-Token header (or ?{profiling.TOKEN_PARAM}=<token>); "
+            "results appear under Profile Records in the dashboard."
+        )
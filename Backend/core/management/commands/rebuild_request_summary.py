@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import summary
+
+
+class Command(BaseCommand):
+    help = "Rebuild the purchase request summary table from scratch and verify it"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify-only',
+            action='store_true',
+            help='Only compare the summary table with a fresh aggregate, do not rebuild',
+        )
+
+    def handle(self, *args, **options):
+        if not options['verify_only']:
+            count = summary.rebuild()
+            self.stdout.write(f"Rebuilt {count} summary buckets")
+
+        mismatches = summary.verify()
+        for (status, month, requester_id), stored, expected in mismatches:
+            self.stderr.write(
+                f"{status} {month:%Y-%m} requester={requester_id}: stored={stored} expected={expected}"
+            )
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} summary buckets are inconsistent")
+        self.stdout.write(self.style.SUCCESS("Summary table is consistent"))
@@ -0,0 +1,193 @@
+import io
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import User, StaffMember, Manager
+from accounts.profiles import PROFILE_MODELS
+from core import summary
+from core.models import PurchaseRequest
+
+ITEMS = [
+    "Laptops", "Office chairs", "Standing desks", "Printer toner", "Monitors", "Network switches",
+    "Conference phones", "Projector", "Whiteboards", "Cleaning supplies", "Software licences",
+    "Server rack", "Safety equipment", "Coffee machine", "Stationery", "Training course",
+]
+VENDORS = [
+    "Acme Supplies", "Northwind Traders", "Globex Office", "Initech Hardware",
+    "Umbrella Logistics", "Stark Electronics", "Wayne Furnishings", "Hooli Cloud",
+]
+# Rough production mix of request states
+STATUS_WEIGHTS = [
+    (PurchaseRequest.PENDING, 40),
+    (PurchaseRequest.APPROVED, 45),
+    (PurchaseRequest.REJECTED, 15),
+]
+
+
+def _synthetic_pdf(lines) -> bytes:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    for number, text in enumerate(lines):
+        pdf.drawString(72, 720 - number * 18, text)
+    pdf.save()
+    return buffer.getvalue()
+
+
+@contextmanager
+def _explicit_timestamps():
+    """Let bulk_create keep the backdated created_at / timestamps values"""
+    fields = [PurchaseRequest._meta.get_field('created_at'), PurchaseRequest._meta.get_field('timestamps')]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-generate users for all three roles and purchase requests with "
+        "synthetic proforma / PO / receipt files, for load and capacity testing"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=10000, help='Purchase requests to create')
+        parser.add_argument('--staff', type=int, default=50, help='Staff users to ensure exist')
+        parser.add_argument('--managers', type=int, default=5, help='Managers to ensure exist')
+        parser.add_argument('--finance', type=int, default=5, help='Finance officers to ensure exist')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows inserted per transaction')
+        parser.add_argument('--days', type=int, default=365, help='Spread creation dates over this many days')
+        parser.add_argument('--prefix', default='seed', help='Username prefix, e.g. seed_staff_0')
+        parser.add_argument('--password', default='password', help='Password for every seeded user')
+        parser.add_argument(
+            '--distinct-files',
+            type=int,
+            default=20,
+            help='Synthetic files generated per kind; rows share them so millions of rows stay cheap on disk',
+        )
+        parser.add_argument('--random-seed', type=int, default=None, help='Make the generated data reproducible')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['distinct_files'] < 1:
+            raise CommandError("--batch-size and --distinct-files must be positive")
+        rng = random.Random(options['random_seed'])
+        started = time.perf_counter()
+
+        counts = {User.STAFF: options['staff'], User.MANAGEMENT: options['managers'], User.FINANCE: options['finance']}
+        self._ensure_users(options['prefix'], options['password'], counts)
+        staff_ids = list(
+            StaffMember.objects.filter(user__username__startswith=f"{options['prefix']}_staff_").values_list('id', flat=True)
+        )
+        manager_ids = list(
+            Manager.objects.filter(user__username__startswith=f"{options['prefix']}_management_").values_list('id', flat=True)
+        )
+        if options['requests'] and not (staff_ids and manager_ids):
+            raise CommandError("Seeding requests needs at least one staff user and one manager")
+
+        files = self._synthetic_files(options['distinct_files'])
+        created = self._create_requests(rng, options, staff_ids, manager_ids, files)
+
+        # bulk_create bypasses the incremental summary maintenance
+        buckets = summary.rebuild()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {created} purchase requests ({created / elapsed if elapsed else 0:.0f} rows/s) "
+            f"and rebuilt {buckets} summary buckets in {elapsed:.1f}s"
+        ))
+
+    def _ensure_users(self, prefix, password, counts):
+        # One hash shared by every seeded user; hashing each would dominate
+        password_hash = make_password(password)
+        for user_type, count in counts.items():
+            usernames = [f"{prefix}_{user_type}_{i}" for i in range(count)]
+            existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+            users = [
+                User(
+                    username=username,
+                    email=f"{username}@example.com",
+                    full_name=username.replace('_', ' ').title(),
+                    user_type=user_type,
+                    password=password_hash,
+                )
+                for username in usernames if username not in existing
+            ]
+            # bulk_create skips post_save, so role profiles are created here too
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                model = PROFILE_MODELS[user_type]
+                model.objects.bulk_create([model(user=user) for user in users])
+            self.stdout.write(f"{user_type}: {len(users)} created, {len(existing)} already present")
+
+    def _synthetic_files(self, count):
+        """Store `count` synthetic files per kind and return their storage names"""
+        files = {'proforma': [], 'purchase_order': [], 'receipt': []}
+        for i in range(count):
+            vendor = VENDORS[i % len(VENDORS)]
+            item = ITEMS[i % len(ITEMS)]
+            for kind, folder, heading in (
+                ('proforma', 'proformas', 'PROFORMA INVOICE'),
+                ('purchase_order', 'purchase_orders', 'PURCHASE ORDER'),
+                ('receipt', 'receipts', 'RECEIPT'),
+            ):
+                content = _synthetic_pdf([heading, vendor, f"{item}  x{i + 1}  100.00", f"Total {100 * (i + 1)}.00"])
+                files[kind].append(default_storage.save(f"{folder}/seed_{kind}_{i}.pdf", ContentFile(content)))
+        return files
+
+    def _create_requests(self, rng, options, staff_ids, manager_ids, files):
+        total, batch_size = options['requests'], options['batch_size']
+        statuses = [status for status, _ in STATUS_WEIGHTS]
+        weights = [weight for _, weight in STATUS_WEIGHTS]
+        now = timezone.now()
+        window = timedelta(days=options['days']).total_seconds()
+        created = 0
+
+        with _explicit_timestamps():
+            while created < total:
+                rows = []
+                for _ in range(min(batch_size, total - created)):
+                    status = rng.choices(statuses, weights)[0]
+                    item, vendor = rng.choice(ITEMS), rng.choice(VENDORS)
+                    created_at = now - timedelta(seconds=rng.random() * window)
+                    pr = PurchaseRequest(
+                        title=f"{item} from {vendor}",
+                        description=f"{rng.randint(1, 50)} x {item.lower()} for the {rng.choice(['finance', 'engineering', 'operations', 'sales'])} team",
+                        amount=Decimal(rng.randint(1000, 5000000)) / 100,
+                        status=status,
+                        created_by_id=rng.choice(staff_ids),
+                        proforma=rng.choice(files['proforma']),
+                        created_at=created_at,
+                        timestamps=created_at,
+                    )
+                    if status != PurchaseRequest.PENDING:
+                        pr.approved_by_id = rng.choice(manager_ids)
+                        pr.timestamps = created_at + timedelta(hours=rng.randint(1, 72))
+                    if status == PurchaseRequest.APPROVED:
+                        pr.purchase_order = rng.choice(files['purchase_order'])
+                        if rng.random() < 0.5:
+                            pr.receipt = rng.choice(files['receipt'])
+                            pr.receipt_validation_status = 'valid' if rng.random() < 0.9 else 'invalid'
+                            pr.receipt_validation_result = {"is_valid": pr.receipt_validation_status == 'valid', "summary": "Seeded"}
+                    rows.append(pr)
+
+                with transaction.atomic():
+                    PurchaseRequest.objects.bulk_create(rows)
+                created += len(rows)
+                if options['verbosity'] > 1:
+                    self.stdout.write(f"{created}/{total} purchase requests")
+        return created
@@ -0,0 +1,165 @@
+"""
+Per-stage timing and counters exported in Prometheus text format.
+
+Wrap a unit of work in ``span("stage")`` to record its duration (and
+whether it raised) in ``p2p_stage_duration_seconds``. Stage names are
+dotted: ``view.<action>`` for API actions, ``extract.*`` for text extraction
+(per engine in ``p2p_extraction_duration_seconds``), ``openai.*`` for LLM calls, ``render.*`` for reportlab and
+``db.*`` for writes done by the services.
+
+Under gunicorn / uvicorn every worker keeps its own counters, so when
+``PROMETHEUS_MULTIPROC_DIR`` is set (it must be set before the process
+starts) prometheus_client writes them to mmap files in that directory and
+``/metrics`` aggregates across all workers. The directory has to exist:
+entrypoint.prod.sh creates it empty before starting either server.
+Exited workers are marked dead by gunicorn.conf.py (child_exit) and
+Backend/asgi.py (at exit).
+"""
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# OCR and LLM stages run for seconds, DB writes for milliseconds
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+STAGE_DURATION = Histogram(
+    'p2p_stage_duration_seconds',
+    'Time spent in a processing stage',
+    ['stage', 'outcome'],
+    buckets=STAGE_BUCKETS,
+)
+OPENAI_REQUESTS = Counter(
+    'p2p_openai_requests_total',
+    'OpenAI chat completion calls',
+    ['operation', 'model'],
+)
+OPENAI_TOKENS = Counter(
+    'p2p_openai_tokens_total',
+    'OpenAI tokens consumed, split into prompt and completion',
+    ['operation', 'model', 'kind'],
+)
+EXTRACTION_DURATION = Histogram(
+    'p2p_extraction_duration_seconds',
+    'Time to extract one document, by engine and the reason it was routed there',
+    ['engine', 'reason'],
+    buckets=STAGE_BUCKETS,
+)
+EXTRACTION_PAGES = Counter(
+    'p2p_extraction_pages_total',
+    'Document pages extracted, by engine',
+    ['engine'],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    'p2p_http_request_duration_seconds',
+    'Wall time per request, by endpoint ("METHOD route")',
+    ['endpoint'],
+    buckets=STAGE_BUCKETS,
+)
+HTTP_REQUEST_QUERIES = Histogram(
+    'p2p_http_request_db_queries',
+    'Database queries issued per request, by endpoint ("METHOD route")',
+    ['endpoint'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+
+
+# Set in core.sandbox children, whose own metric values die with them:
+# span() collects (stage, outcome, seconds) here for the parent to record
+_deferred_spans = None
+
+
+@contextmanager
+def span(stage):
+    """Time the enclosed block under ``stage``; works around awaits too"""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        elapsed = time.perf_counter() - started
+        if _deferred_spans is not None:
+            _deferred_spans.append((stage, outcome, elapsed))
+        else:
+            STAGE_DURATION.labels(stage, outcome).observe(elapsed)
+
+
+def defer_spans():
+    """Collect this process's span() timings in the returned list from now on"""
+    global _deferred_spans
+    _deferred_spans = []
+    return _deferred_spans
+
+
+def record_spans(spans):
+    """Record span timings collected by defer_spans() in another process"""
+    for stage, outcome, seconds in spans:
+        STAGE_DURATION.labels(stage, outcome).observe(seconds)
+
+
+def timed(stage):
+    """Decorator form of span() for plain and async functions"""
+    def decorator(func):
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_openai_usage(operation, response):
+    """Count one completion and its token usage (if the API reported it)"""
+    model = getattr(response, 'model', None) or 'unknown'
+    OPENAI_REQUESTS.labels(operation, model).inc()
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return
+    OPENAI_TOKENS.labels(operation, model, 'prompt').inc(usage.prompt_tokens or 0)
+    OPENAI_TOKENS.labels(operation, model, 'completion').inc(usage.completion_tokens or 0)
+
+
+def _registry():
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. The scraper has to send METRICS_TOKEN as a
+    bearer token; with no token configured it is only served under DEBUG.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponseForbidden()
+    else:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not constant_time_compare(supplied, token):
+            return HttpResponseForbidden()
+    return HttpResponse(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,264 @@
+"""
+Per-request latency and ORM accounting, the opt-in profiling hook,
+read-your-writes tracking for the read replica and an async-capable
+WhiteNoise.
+
+RequestTimingMiddleware times every request, counts the queries it issued
+and the time spent in them (through a connection execute_wrapper, so no
+DEBUG query log is needed), and keys the result by the resolved view name.
+Requests over SLOW_REQUEST_THRESHOLD_MS or SLOW_REQUEST_QUERY_THRESHOLD are
+logged with their most repeated SQL, which is usually an N+1.
+
+Each process keeps a rolling window of the last REQUEST_STATS_WINDOW
+samples per endpoint for the dashboard request-stats page; the same
+numbers also go to the Prometheus histograms in core.metrics, which are
+aggregated across workers.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from core import db_router, metrics, profiling
+
+logger = logging.getLogger(__name__)
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that can sit in an async middleware chain. WhiteNoise itself
+    is sync-only, so under ASGI Django would run everything below it,
+    async views included, through a worker thread for the whole request.
+    Here only static file hits use a thread; other requests are awaited.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return await self.get_response(request)
+        return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+
+
+class QueryRecorder:
+    """execute_wrapper that counts queries, their time and repeated SQL"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            # sql is the parametrised statement, so repeats of the same
+            # query with different values collapse into one entry
+            self.statements[sql] += 1
+
+
+class EndpointStats:
+    """Rolling per-endpoint samples of (wall seconds, queries, db seconds)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(self._window)
+
+    @staticmethod
+    def _window():
+        return deque(maxlen=getattr(settings, 'REQUEST_STATS_WINDOW', 500))
+
+    def record(self, endpoint, duration, queries, db_time):
+        with self._lock:
+            self._samples[endpoint].append((duration, queries, db_time))
+
+    @staticmethod
+    def _percentile(ordered, pct):
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def snapshot(self):
+        """Per-endpoint percentiles in milliseconds, slowest p95 first"""
+        with self._lock:
+            samples = {endpoint: list(window) for endpoint, window in self._samples.items()}
+
+        rows = []
+        for endpoint, window in samples.items():
+            durations = sorted(sample[0] for sample in window)
+            # Async requests don't report DB activity (None)
+            db_samples = [sample for sample in window if sample[1] is not None]
+            rows.append({
+                "endpoint": endpoint,
+                "samples": len(window),
+                "p50_ms": round(self._percentile(durations, 50) * 1000, 1),
+                "p95_ms": round(self._percentile(durations, 95) * 1000, 1),
+                "p99_ms": round(self._percentile(durations, 99) * 1000, 1),
+                "max_ms": round(durations[-1] * 1000, 1),
+                "avg_queries": round(sum(s[1] for s in db_samples) / len(db_samples), 1) if db_samples else None,
+                "avg_db_ms": round(sum(s[2] for s in db_samples) / len(db_samples) * 1000, 1) if db_samples else None,
+            })
+        rows.sort(key=lambda row: row["p95_ms"], reverse=True)
+        return rows
+
+
+endpoint_stats = EndpointStats()
+
+
+def _endpoint(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return f"{request.method} unresolved"
+    return f"{request.method} {match.view_name or match.route}"
+
+
+class RequestTimingMiddleware:
+    """
+    Records wall time, query count and DB time per resolved endpoint.
+
+    Streaming responses are timed until the response object is returned,
+    not until the body has been sent. Under ASGI the ORM runs in worker
+    threads whose connections this middleware can't see, so async requests
+    record wall time only.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_seconds = getattr(settings, 'SLOW_REQUEST_THRESHOLD_MS', 1000) / 1000
+        self.slow_queries = getattr(settings, 'SLOW_REQUEST_QUERY_THRESHOLD', 50)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        self._record(request, response, time.perf_counter() - started, recorder)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, time.perf_counter() - started, None)
+        return response
+
+    def _record(self, request, response, duration, recorder):
+        endpoint = _endpoint(request)
+        queries = recorder.count if recorder else None
+        db_time = recorder.duration if recorder else None
+
+        endpoint_stats.record(endpoint, duration, queries, db_time)
+        metrics.HTTP_REQUEST_DURATION.labels(endpoint).observe(duration)
+        if queries is not None:
+            metrics.HTTP_REQUEST_QUERIES.labels(endpoint).observe(queries)
+
+        if duration >= self.slow_seconds or (queries is not None and queries >= self.slow_queries):
+            repeated = ""
+            if recorder:
+                repeated = "".join(
+                    f"\n  {count}x {sql}" for sql, count in recorder.statements.most_common(5) if count > 1
+                )
+            logger.warning(
+                "Slow request %s (%s) status=%s time=%.0fms queries=%s db=%s%s",
+                request.path,
+                endpoint,
+                response.status_code,
+                duration * 1000,
+                queries if queries is not None else "n/a",
+                f"{db_time * 1000:.0f}ms" if db_time is not None else "n/a",
+                repeated,
+            )
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request when it carries a valid staff profiling token (see
+    core.profiling); everything else passes straight through. Async
+    requests are never profiled.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.get_response(request)
+
+        token = profiling.request_token(request)
+        if token is None:
+            return self.get_response(request)
+        grant = profiling.read_token(token)
+        if grant is None:
+            logger.warning("Ignoring invalid or expired profiling token on %s", request.path)
+            return self.get_response(request)
+        return profiling.profile_request(request, self.get_response, grant)
+
+
+class ReadYourWritesMiddleware:
+    """
+    After a successful unsafe request by an authenticated user, keeps that
+    user's replica-eligible reads on the primary for a short window (see
+    core.db_router). Does nothing unless a replica is configured.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = db_router.replica_configured()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self._track(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        self._track(request, response)
+        return response
+
+    def _track(self, request, response):
+        if not self.enabled or request.method in ('GET', 'HEAD', 'OPTIONS') or response.status_code >= 400:
+            return
+        # DRF and the async views set request.user to the token user
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            db_router.mark_write(user.id)
@@ -1,5 +1,9 @@
 import uuid
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 
 # Create your models here.
 from accounts.models import Manager, FinanceOfficer, StaffMember
@@ -27,6 +31,18 @@ class PurchaseRequest(models.Model):
     purchase_order = models.FileField(upload_to='purchase_orders/', null=True, blank=True)
     receipt = models.FileField(upload_to='receipts/', null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    proforma_text = models.TextField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='Proforma text extracted in the background at upload time (core.tasks.extract_proforma)'
+    )
+    proforma_tables = models.JSONField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Line items / pricing parsed from the proforma's tables (core.extraction.parse_tables); {} if it has none"
+    )
 
     # Receipt validation fields
     receipt_validation_status = models.CharField(
@@ -46,6 +62,16 @@ class PurchaseRequest(models.Model):
         blank=True,
         help_text='Detailed validation results from AI'
     )
+
+    # Full-text search document, maintained by Postgres as a stored generated column
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('title', weight='A', config='english')
+            + SearchVector('description', weight='B', config='english')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
     
     def __str__(self):
         return f"{self.title} - {self.status}"
@@ -53,4 +79,136 @@ class PurchaseRequest(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Purchase Request'
-        verbose_name_plural = 'Purchase Requests'
\ No newline at end of file
+        verbose_name_plural = 'Purchase Requests'
+        indexes = [
+            # Staff list view: filter on requester, newest first
+            models.Index(fields=['created_by', '-created_at'], name='pr_creator_created_idx'),
+            # Manager / finance list view filtered on status, newest first
+            models.Index(fields=['status', '-created_at'], name='pr_status_created_idx'),
+            # The pending queue is the hottest status filter and a small slice of the table
+            models.Index(
+                fields=['-created_at'],
+                name='pr_pending_created_idx',
+                condition=Q(status='pending'),
+            ),
+            GinIndex(fields=['search_vector'], name='pr_search_vector_gin'),
+        ]
+
+class PurchaseOrder(models.Model):
+    """
+    Structured result of the AI extraction done when a PO is generated:
+    vendor, pricing and terms, with the line items in PurchaseOrderItem.
+    Kept so receipt validation, reporting and PO regeneration can read it
+    instead of repeating the OCR and LLM work (see core.purchase_orders).
+    """
+    purchase_request = models.OneToOneField(PurchaseRequest, on_delete=models.CASCADE, related_name='po_details')
+    vendor_name = models.CharField(max_length=255, blank=True)
+    vendor_address = models.TextField(blank=True)
+    vendor_contact = models.CharField(max_length=255, blank=True)
+    subtotal = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    tax = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    shipping = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    total = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    payment_terms = models.CharField(max_length=255, blank=True)
+    delivery_terms = models.CharField(max_length=255, blank=True)
+    validity = models.CharField(max_length=255, blank=True)
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"PO for {self.purchase_request_id} ({self.vendor_name or 'unknown vendor'})"
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Purchase Order'
+        verbose_name_plural = 'Purchase Orders'
+        indexes = [
+            models.Index(fields=['vendor_name'], name='po_vendor_name_idx'),
+            # Case-insensitive vendor lookups (vendor_name__iexact / reporting by vendor)
+            models.Index(Upper('vendor_name'), name='po_vendor_name_upper_idx'),
+        ]
+
+
+class PurchaseOrderItem(models.Model):
+    purchase_order = models.ForeignKey(PurchaseOrder, on_delete=models.CASCADE, related_name='items')
+    position = models.PositiveSmallIntegerField(help_text='Order of the line on the proforma')
+    description = models.TextField()
+    quantity = models.DecimalField(max_digits=12, decimal_places=3, null=True, blank=True)
+    unit_price = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    total = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+
+    def __str__(self):
+        return self.description
+
+    class Meta:
+        ordering = ['purchase_order', 'position']
+        verbose_name = 'Purchase Order Item'
+        verbose_name_plural = 'Purchase Order Items'
+        constraints = [
+            models.UniqueConstraint(fields=['purchase_order', 'position'], name='po_item_position_unique'),
+        ]
+
+
+class PurchaseRequestSummary(models.Model):
+    """
+    Pre-aggregated request counts and spend per (status, month, requester).
+    Maintained incrementally by core.summary in the same transaction as the
+    purchase request writes, so dashboards never GROUP BY the request table.
+    """
+    status = models.CharField(max_length=10, choices=PurchaseRequest.status_choices)
+    month = models.DateField(help_text='First day of the month the request was created in')
+    requester = models.ForeignKey(StaffMember, on_delete=models.CASCADE, null=True, blank=True, related_name='request_summaries')
+    # Signed so a decrement on a drifted bucket is reported by
+    # summary.verify() instead of failing the request write
+    request_count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.status}: {self.request_count}"
+
+    class Meta:
+        ordering = ['-month', 'status']
+        verbose_name = 'Purchase Request Summary'
+        verbose_name_plural = 'Purchase Request Summaries'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['status', 'month', 'requester'],
+                name='pr_summary_bucket_unique',
+                nulls_distinct=False,
+            ),
+        ]
+
+
+class ProfileRecord(models.Model):
+    """
+    Output of one request run under the opt-in profiler (core.profiling).
+    `output` holds collapsed stacks for sampling runs (flamegraph.pl /
+    speedscope input) or a pstats dump for cProfile runs.
+    """
+    SAMPLING = 'sample'
+    DETERMINISTIC = 'cprofile'
+    mode_choices = [
+        (SAMPLING, 'Sampling'),
+        (DETERMINISTIC, 'Deterministic (cProfile)'),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    endpoint = models.CharField(max_length=255, blank=True)
+    mode = models.CharField(max_length=10, choices=mode_choices)
+    requested_by = models.CharField(max_length=255, help_text='Staff user the profiling token was minted for')
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    duration_ms = models.FloatField()
+    samples = models.PositiveIntegerField(default=0, help_text='Stack samples (sampling) or function calls (cProfile)')
+    report = models.TextField(blank=True)
+    output = models.FileField(upload_to='profiles/')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f}ms)"
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Profile Record'
+        verbose_name_plural = 'Profile Records'
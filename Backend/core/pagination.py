@@ -0,0 +1,18 @@
+from rest_framework.pagination import PageNumberPagination
+
+
+class OptionalPageNumberPagination(PageNumberPagination):
+    """
+    Page number pagination that only kicks in when the client asks for it.
+
+    Existing clients expect the plain list response, so results are only
+    paginated when `page` or `page_size` is present in the query string.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.page_query_param not in request.query_params \
+                and self.page_size_query_param not in request.query_params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
@@ -1,5 +1,6 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
-from accounts.models import User
+from accounts.models import User, Manager, StaffMember, FinanceOfficer
+from accounts.profiles import get_role_profile
 
 
 class HasManagmentPermission(BasePermission):
@@ -8,13 +9,13 @@ class HasManagmentPermission(BasePermission):
     def has_permission(self, request, view):
         if request.user.is_authenticated:
             if request.user.user_type == User.MANAGEMENT:
-                return True
+                return get_role_profile(request, Manager) is not None
         return False
     
     def has_object_permission(self, request, view, obj):
         if request.user.is_authenticated:
             if request.user.user_type == User.MANAGEMENT:
-                return True
+                return get_role_profile(request, Manager) is not None
         return False
     
 
@@ -24,13 +25,13 @@ class HasFinanceMemberPermission(BasePermission):
     def has_permission(self, request, view):
         if request.user.is_authenticated:
             if request.user.user_type == User.FINANCE:
-                return True
+                return get_role_profile(request, FinanceOfficer) is not None
         return False
     
     def has_object_permission(self, request, view, obj):
         if request.user.is_authenticated:
             if request.user.user_type == User.FINANCE:
-                return True
+                return get_role_profile(request, FinanceOfficer) is not None
         return False
     
 
@@ -40,11 +41,11 @@ class HasStaffMemberPermission(BasePermission):
     def has_permission(self, request, view):
         if request.user.is_authenticated:
             if request.user.user_type == User.STAFF:
-                return True
+                return get_role_profile(request, StaffMember) is not None
         return False
     
     def has_object_permission(self, request, view, obj):
         if request.user.is_authenticated:
             if request.user.user_type == User.STAFF:
-                return True
-        return False
\ No newline at end of file
+                return get_role_profile(request, StaffMember) is not None
+        return False
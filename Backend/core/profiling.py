@@ -0,0 +1,211 @@
+"""
+Opt-in profiling of a single production request.
+
+A staff user mints a short-lived signed token (``manage.py profile_token``)
+and sends it as the ``X-Profile-Token`` header or the ``_profile`` query
+parameter. ProfilingMiddleware then runs that one request under either
+
+* a sampling profiler: a side thread snapshots the request thread's stack
+  every PROFILING_SAMPLE_INTERVAL_MS and the result is stored as collapsed
+  stacks (one ``frame;frame;frame count`` line per distinct stack), or
+* cProfile: every call is traced and the pstats dump is stored.
+
+Either way a ProfileRecord with a readable report is saved and can be
+downloaded from the dashboard admin. Requests without a token only pay for
+a header lookup.
+"""
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, namedtuple
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.base import ContentFile
+
+from accounts.models import User
+from core.models import ProfileRecord
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = 'HTTP_X_PROFILE_TOKEN'
+TOKEN_PARAM = '_profile'
+TOKEN_SALT = 'core.profiling'
+
+ProfileGrant = namedtuple('ProfileGrant', ['username', 'mode'])
+
+
+def mint_token(user, mode=ProfileRecord.SAMPLING):
+    """Signed, timestamped token allowing `user` to profile requests"""
+    return signing.dumps({"user": str(user.pk), "mode": mode}, salt=TOKEN_SALT)
+
+
+def read_token(token):
+    """
+    Return the ProfileGrant for a valid, unexpired token whose user is still
+    active staff, otherwise None
+    """
+    try:
+        payload = signing.loads(
+            token,
+            salt=TOKEN_SALT,
+            max_age=getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 3600),
+        )
+    except signing.BadSignature:
+        return None
+    user = User.objects.filter(pk=payload.get("user"), is_active=True, staff=True).first()
+    if user is None or payload.get("mode") not in dict(ProfileRecord.mode_choices):
+        return None
+    return ProfileGrant(user.username, payload["mode"])
+
+
+def request_token(request):
+    token = request.META.get(TOKEN_HEADER)
+    # Don't parse the query string unless the parameter could be there
+    if token is None and TOKEN_PARAM in request.META.get('QUERY_STRING', ''):
+        token = request.GET.get(TOKEN_PARAM)
+    return token
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    filename = code.co_filename
+    for marker in ('site-packages/', str(settings.BASE_DIR) + '/'):
+        if marker in filename:
+            filename = filename.split(marker, 1)[1]
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Samples one thread's stack from a daemon thread. Frames above `root`
+    (the server and middleware above the profiler) are left out.
+    """
+
+    def __init__(self, thread_id, root, interval):
+        self.thread_id = thread_id
+        self.root = root
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None and frame is not self.root:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            if labels:
+                self.stacks[';'.join(reversed(labels))] += 1
+
+
+def _call_tree(stacks, total, min_share=0.01):
+    """Indented call tree of the sampled stacks, pruned below min_share"""
+    tree = {}
+    for stack, count in stacks.items():
+        node = tree
+        for label in stack.split(';'):
+            entry = node.setdefault(label, [0, {}])
+            entry[0] += count
+            node = entry[1]
+
+    lines = []
+
+    def walk(node, depth):
+        for label, (count, children) in sorted(node.items(), key=lambda item: -item[1][0]):
+            if count < total * min_share:
+                continue
+            lines.append(f"{count / total:6.1%} {count:6d}  {'  ' * depth}{label}")
+            walk(children, depth + 1)
+
+    walk(tree, 0)
+    return lines
+
+
+def _sampling_report(stacks, interval):
+    total = sum(stacks.values())
+    if not total:
+        return "No samples collected; the request finished within one sampling interval."
+
+    own = Counter()
+    inclusive = Counter()
+    for stack, count in stacks.items():
+        labels = stack.split(';')
+        own[labels[-1]] += count
+        for label in set(labels):
+            inclusive[label] += count
+
+    lines = [f"{total} samples every {interval * 1000:g}ms", "", "Self time:"]
+    lines += [f"{count / total:6.1%} {count:6d}  {label}" for label, count in own.most_common(25)]
+    lines += ["", "Inclusive time:"]
+    lines += [f"{count / total:6.1%} {count:6d}  {label}" for label, count in inclusive.most_common(25)]
+    lines += ["", "Call tree:"]
+    lines += _call_tree(stacks, total)
+    return "\n".join(lines)
+
+
+def _profile_sampling(request, get_response):
+    interval = getattr(settings, 'PROFILING_SAMPLE_INTERVAL_MS', 5) / 1000
+    with StackSampler(threading.get_ident(), sys._getframe(), interval) as sampler:
+        response = get_response(request)
+    output = "".join(f"{stack} {count}\n" for stack, count in sampler.stacks.most_common())
+    return response, output.encode(), 'txt', _sampling_report(sampler.stacks, interval), sum(sampler.stacks.values())
+
+
+def _profile_deterministic(request, get_response):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        response = get_response(request)
+    finally:
+        profiler.disable()
+
+    report = io.StringIO()
+    stats = pstats.Stats(profiler, stream=report)
+    # Same format as Stats.dump_stats(), loadable by pstats / snakeviz
+    output = marshal.dumps(stats.stats)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(60)
+    return response, output, 'prof', report.getvalue(), stats.total_calls
+
+
+def profile_request(request, get_response, grant):
+    """Run the rest of the middleware chain under the granted profiler and store the result"""
+    profile = _profile_deterministic if grant.mode == ProfileRecord.DETERMINISTIC else _profile_sampling
+    started = time.perf_counter()
+    response, output, extension, report, samples = profile(request, get_response)
+    duration = time.perf_counter() - started
+
+    match = getattr(request, 'resolver_match', None)
+    record = ProfileRecord(
+        method=request.method,
+        path=request.path[:2048],
+        endpoint=match.view_name if match else '',
+        mode=grant.mode,
+        requested_by=grant.username,
+        status_code=response.status_code,
+        duration_ms=duration * 1000,
+        samples=samples,
+        report=report,
+    )
+    record.output.save(f"{record.id}.{extension}", ContentFile(output), save=False)
+    record.save()
+    logger.info("Profiled %s %s for %s: record %s", request.method, request.path, grant.username, record.id)
+
+    response['X-Profile-Id'] = str(record.id)
+    return response
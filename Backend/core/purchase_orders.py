@@ -0,0 +1,142 @@
+"""
+Structured storage of AI-extracted purchase order data.
+
+`store` normalizes the dict returned by POGenerationService's extraction
+(vendor / items / pricing / terms / notes, free-form strings such as
+"$1,200.00" or "N/A") into PurchaseOrder + PurchaseOrderItem rows;
+`load` turns them back into that same shape so the PDF renderer and the
+receipt validation prompt can use them without another OCR / LLM pass.
+"""
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from core.models import PurchaseOrder, PurchaseOrderItem, PurchaseRequest
+
+_NOT_NUMERIC = re.compile(r'[^\d.\-]')
+
+
+def _text(value, max_length=None):
+    if value is None:
+        return ''
+    text = str(value).strip()
+    if text.upper() == 'N/A':
+        return ''
+    return text[:max_length] if max_length else text
+
+
+def _decimal(value, model=PurchaseOrder, name='total'):
+    """
+    Parse an amount like "$1,200.00" or "3 units" for model.name; None when
+    there is none or it doesn't fit the column (the LLM's strings are not
+    trusted to be sane numbers).
+    """
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        value = str(value)
+    cleaned = _NOT_NUMERIC.sub('', _text(value))
+    try:
+        number = Decimal(cleaned)
+    except InvalidOperation:
+        return None
+    field = model._meta.get_field(name)
+    if not number.is_finite() or abs(number) >= 10 ** (field.max_digits - field.decimal_places):
+        return None
+    return number.quantize(Decimal(1).scaleb(-field.decimal_places))
+
+
+def _short(name, value):
+    """_text truncated to the PurchaseOrder column's max_length"""
+    return _text(value, PurchaseOrder._meta.get_field(name).max_length)
+
+
+def _display(value):
+    return 'N/A' if value is None or value == '' else str(value)
+
+
+def _quantity(value):
+    # Stored with three places: show 3 rather than 3.000
+    return 'N/A' if value is None else format(value.normalize(), 'f')
+
+
+def store(purchase_request: PurchaseRequest, po_data) -> PurchaseOrder:
+    """
+    Replace the stored PO data of purchase_request with po_data.
+    Returns None (and stores nothing) when the extraction failed.
+    """
+    if not isinstance(po_data, dict) or po_data.get('error'):
+        return None
+    vendor = po_data.get('vendor') or {}
+    pricing = po_data.get('pricing') or {}
+    terms = po_data.get('terms') or {}
+
+    with transaction.atomic():
+        order, _ = PurchaseOrder.objects.update_or_create(
+            purchase_request=purchase_request,
+            defaults=dict(
+                vendor_name=_short('vendor_name', vendor.get('name')),
+                vendor_address=_text(vendor.get('address')),
+                vendor_contact=_short('vendor_contact', vendor.get('contact')),
+                subtotal=_decimal(pricing.get('subtotal')),
+                tax=_decimal(pricing.get('tax')),
+                shipping=_decimal(pricing.get('shipping')),
+                total=_decimal(pricing.get('total')),
+                payment_terms=_short('payment_terms', terms.get('payment')),
+                delivery_terms=_short('delivery_terms', terms.get('delivery')),
+                validity=_short('validity', terms.get('validity')),
+                notes=_text(po_data.get('notes')),
+            ),
+        )
+        order.items.all().delete()
+        PurchaseOrderItem.objects.bulk_create([
+            PurchaseOrderItem(
+                purchase_order=order,
+                position=position,
+                description=_text(item.get('description')) or 'N/A',
+                quantity=_decimal(item.get('quantity'), PurchaseOrderItem, 'quantity'),
+                unit_price=_decimal(item.get('unit_price'), PurchaseOrderItem, 'unit_price'),
+                total=_decimal(item.get('total'), PurchaseOrderItem, 'total'),
+            )
+            for position, item in enumerate(po_data.get('items') or [])
+            if isinstance(item, dict)
+        ])
+    return order
+
+
+def load(purchase_request: PurchaseRequest):
+    """Stored PO data in the extraction's dict shape, or None if there is none"""
+    order = (
+        PurchaseOrder.objects.filter(purchase_request=purchase_request)
+        .prefetch_related('items')
+        .first()
+    )
+    if order is None:
+        return None
+    return {
+        "vendor": {
+            "name": _display(order.vendor_name),
+            "address": _display(order.vendor_address),
+            "contact": _display(order.vendor_contact),
+        },
+        "items": [
+            {
+                "description": item.description,
+                "quantity": _quantity(item.quantity),
+                "unit_price": _display(item.unit_price),
+                "total": _display(item.total),
+            }
+            for item in order.items.all()
+        ],
+        "pricing": {
+            "subtotal": _display(order.subtotal),
+            "tax": _display(order.tax),
+            "shipping": _display(order.shipping),
+            "total": _display(order.total),
+        },
+        "terms": {
+            "payment": _display(order.payment_terms),
+            "delivery": _display(order.delivery_terms),
+            "validity": _display(order.validity),
+        },
+        "notes": _display(order.notes),
+    }
@@ -0,0 +1,140 @@
+"""
+Run document extraction in a throwaway process with resource limits.
+
+A malformed PDF or a decompression-bomb image can keep pdfplumber or
+tesseract busy (or growing) indefinitely. run() executes the extraction
+in a child process forked from a forkserver that has the extraction
+libraries, the settings and the server's main module preloaded. The
+first run() in a worker starts the forkserver, which takes about half a
+second; after that a child starts in tens of milliseconds. The child gets
+CPU-time and address-space rlimits (Linux doesn't enforce RLIMIT_RSS, so
+RLIMIT_AS is the memory cap; tesseract subprocesses inherit both) and its
+own process group, which is killed outright once EXTRACTION_TIMEOUT
+passes. Every failure comes back as a typed core.extraction error.
+
+Set EXTRACTION_SANDBOX=False to run extraction in-process (development).
+"""
+import multiprocessing
+import os
+import resource
+import signal
+import threading
+
+from django.conf import settings
+
+from core import metrics
+from core.extraction import ExtractionError, ExtractionResourceLimit, ExtractionTimeout, FAILURES
+
+# Imported once by the forkserver and shared by every child it forks.
+# Without '__main__' every child would re-run the server's main script
+# (gunicorn, uvicorn, manage.py) and whatever that imports.
+PRELOAD = [
+    '__main__', 'core.extraction', 'numpy', 'PIL.Image', 'PIL.TiffImagePlugin', 'PyPDF2', 'pdfplumber',
+    'pytesseract', 'prometheus_client',
+]
+
+_context = None
+_context_lock = threading.Lock()
+
+
+def _get_context():
+    global _context
+    with _context_lock:
+        if _context is None:
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(PRELOAD + [os.environ.get('DJANGO_SETTINGS_MODULE', 'Backend.settings')])
+            _context = context
+        return _context
+
+
+def _child(conn, func, args, memory_bytes, cpu_seconds):
+    # Own process group, so the parent can kill tesseract subprocesses too
+    os.setsid()
+    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    # Keep metrics in memory: prometheus multiprocess mode would leave a
+    # values file behind for every short-lived child. Stage timings are
+    # sent back to the parent instead, which records them.
+    from prometheus_client import values
+    values.ValueClass = values.MutexValue
+    spans = metrics.defer_spans()
+
+    try:
+        conn.send(('ok', func(*args), spans))
+    except MemoryError:
+        conn.send(('error', ExtractionResourceLimit.code, "Memory limit exceeded", spans))
+    except ExtractionError as e:
+        conn.send(('error', e.code, str(e), spans))
+    except Exception as e:
+        conn.send(('error', ExtractionError.code, f"{type(e).__name__}: {e}", spans))
+    finally:
+        conn.close()
+
+
+def _kill_group(pid):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        # Already gone, or the child never got as far as setsid()
+        pass
+
+
+def _exit_failure(exitcode):
+    if exitcode == -signal.SIGXCPU:
+        return ExtractionResourceLimit(f"CPU time limit of {settings.EXTRACTION_CPU_SECONDS}s exceeded")
+    if exitcode == -signal.SIGKILL:
+        # Hard CPU limit or the kernel's OOM killer
+        return ExtractionResourceLimit("Extraction process was killed")
+    return ExtractionError(f"Extraction process exited with code {exitcode}")
+
+
+def _run_in_process(func, *args):
+    try:
+        return func(*args)
+    except ExtractionError:
+        raise
+    except MemoryError:
+        raise ExtractionResourceLimit("Memory limit exceeded")
+    except Exception as e:
+        raise ExtractionError(f"{type(e).__name__}: {e}") from e
+
+
+def run(func, *args):
+    """
+    Call func(*args) (a module-level function) under the extraction limits
+    and return its result. Raises an ExtractionError subclass on failure.
+    """
+    if not settings.EXTRACTION_SANDBOX:
+        return _run_in_process(func, *args)
+
+    context = _get_context()
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_child,
+        args=(sender, func, args, settings.EXTRACTION_MEMORY_MB * 1024 * 1024, settings.EXTRACTION_CPU_SECONDS),
+        daemon=True,
+    )
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(settings.EXTRACTION_TIMEOUT):
+            raise ExtractionTimeout(f"Extraction took longer than {settings.EXTRACTION_TIMEOUT}s")
+        try:
+            message = receiver.recv()
+        except EOFError:
+            # Died without reporting back (signal, rlimit, crash in C code)
+            process.join(1)
+            raise _exit_failure(process.exitcode)
+    finally:
+        receiver.close()
+        _kill_group(process.pid)
+        process.join(1)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    metrics.record_spans(message[-1])
+    if message[0] == 'ok':
+        return message[1]
+    _, code, description, _ = message
+    raise FAILURES.get(code, ExtractionError)(description)
@@ -1,6 +1,8 @@
+import os
 from random import choice
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 from rest_framework import serializers, exceptions
+from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth.password_validation import validate_password
 from django.core import exceptions as django_exceptions
@@ -8,6 +10,7 @@ from django.contrib.auth import authenticate
 from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
 
 from accounts.models import User
+from core import extraction
 from core.models import PurchaseRequest
 from utils.fields import CurrentStaffMemberDefault
 
@@ -114,6 +117,8 @@ class PurchaseRequestSerializer(serializers.ModelSerializer):
             'receipt_validation_status',
             'receipt_validation_result',
         ]
+        # Status only changes through core.transitions
+        read_only_fields = ['status']
 
     def get_approver_details(self, obj: PurchaseRequest):
         if obj.approved_by:
@@ -127,9 +132,96 @@ class PurchaseRequestSerializer(serializers.ModelSerializer):
         
         
 
+
 class SubmitReceiptSerializer(serializers.ModelSerializer):
     receipt = serializers.FileField()
+    receipt_pages = serializers.ListField(
+        child=serializers.FileField(),
+        required=False,
+        write_only=True,
+        max_length=settings.RECEIPT_MAX_IMAGES - 1,
+        help_text='Further photos of the same receipt; stored with `receipt` as one multi-page TIFF',
+    )
 
     class Meta:
         model = PurchaseRequest
-        fields = ['receipt']
\ No newline at end of file
+        fields = ['receipt', 'receipt_pages']
+
+    def validate(self, attrs):
+        pages = attrs.pop('receipt_pages', [])
+        if not pages:
+            return attrs
+        images = [attrs['receipt'], *pages]
+        if any(os.path.splitext(image.name)[1].lower() not in extraction.IMAGE_EXTENSIONS for image in images):
+            raise serializers.ValidationError({"receipt_pages": "Only images can be combined into one receipt"})
+        try:
+            attrs['receipt'] = extraction.combine_images(images, f"{os.path.splitext(images[0].name)[0]}.tiff")
+        except Exception as e:
+            raise serializers.ValidationError({"receipt_pages": f"Could not combine the receipt images: {e}"})
+        return attrs
+
+class PurchaseRequestFilterSerializer(serializers.Serializer):
+    """Validates the query parameters accepted by the purchase request list."""
+    q = serializers.CharField(max_length=200, required=False, allow_blank=True,
+                              help_text='Full-text search over title and description')
+    status = serializers.ChoiceField(choices=PurchaseRequest.status_choices, required=False)
+    min_amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    max_amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    created_after = serializers.DateField(required=False)
+    created_before = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        min_amount, max_amount = attrs.get('min_amount'), attrs.get('max_amount')
+        if min_amount is not None and max_amount is not None and min_amount > max_amount:
+            raise serializers.ValidationError({"min_amount": "min_amount cannot be greater than max_amount"})
+
+        created_after, created_before = attrs.get('created_after'), attrs.get('created_before')
+        if created_after and created_before and created_after > created_before:
+            raise serializers.ValidationError({"created_after": "created_after cannot be later than created_before"})
+        return attrs
+
+
+class PurchaseRequestExportSerializer(PurchaseRequestFilterSerializer):
+    # Not `format`: DRF reserves that query param for content negotiation
+    export_format = serializers.ChoiceField(choices=['csv', 'ndjson'], default='csv')
+
+
+class SummaryTotalsSerializer(serializers.Serializer):
+    request_count = serializers.IntegerField()
+    total_amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class StatusSummarySerializer(SummaryTotalsSerializer):
+    status = serializers.CharField()
+
+
+class MonthSummarySerializer(StatusSummarySerializer):
+    month = serializers.CharField()
+
+
+class RequesterSummarySerializer(StatusSummarySerializer):
+    requester = serializers.CharField(allow_null=True)
+
+
+class PurchaseRequestSummarySerializer(serializers.Serializer):
+    totals = SummaryTotalsSerializer()
+    by_status = StatusSummarySerializer(many=True)
+    by_month = MonthSummarySerializer(many=True)
+    by_requester = RequesterSummarySerializer(many=True)
+
+
+class BulkTransitionSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False, max_length=500)
+
+
+class BulkTransitionResultSerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    outcome = serializers.ChoiceField(choices=['approved', 'rejected', 'not_pending', 'not_found'])
+    status = serializers.CharField(allow_null=True)
+
+
+class BulkTransitionResponseSerializer(serializers.Serializer):
+    successMessage = serializers.CharField()
+    status_code = serializers.IntegerField()
+    results = BulkTransitionResultSerializer(many=True)
+    po_generation_queued = serializers.IntegerField()
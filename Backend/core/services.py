@@ -1,18 +1,48 @@
 import os
 import io
+import json
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any
 from datetime import datetime
-from openai import OpenAI
-import pdfplumber
-from PIL import Image
-import pytesseract
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.units import inch
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.core.files.base import ContentFile
 
+from core import events, extraction, metrics, purchase_orders
+
+logger = logging.getLogger(__name__)
+
+# openai and reportlab (like the extraction libraries, in core.extraction)
+# are imported inside the functions that use them: together they add hundreds of milliseconds and tens
+# of MB to every process that imports this module, and most never need them.
+
+# Blocking extraction / PDF work used by the async code paths runs here so it
+# never stalls the event loop
+_blocking_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'AI_BLOCKING_WORKERS', 4),
+    thread_name_prefix='ai-blocking',
+)
+
+
+# Keys of the "pricing" object of the PO extraction
+PRICING_KEYS = ('subtotal', 'tax', 'shipping', 'total')
+
+
+async def run_blocking(func, *args):
+    """Run a blocking call on the shared executor from async code"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_executor, func, *args)
+
+
+def _openai_client_kwargs() -> Dict[str, Any]:
+    api_key = os.environ.get('OPENAI_API_KEY')
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY environment variable is not set")
+    # OPENAI_BASE_URL lets load tests point at a stub LLM server
+    return {"api_key": api_key, "base_url": os.environ.get('OPENAI_BASE_URL') or None}
+
 
 class ReceiptValidationService:
     """
@@ -21,55 +51,14 @@ class ReceiptValidationService:
     """
 
     def __init__(self):
-        api_key = os.environ.get('OPENAI_API_KEY')
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY environment variable is not set")
-        self.client = OpenAI(api_key=api_key)
-
-    def extract_text_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF file using pdfplumber"""
-        try:
-            with pdfplumber.open(file_path) as pdf:
-                text = ""
-                for page in pdf.pages:
-                    text += page.extract_text() or ""
-                return text
-        except Exception as e:
-            return f"Error extracting PDF text: {str(e)}"
+        from openai import OpenAI, AsyncOpenAI
 
-    def extract_text_from_image(self, file_path: str) -> str:
-        """Extract text from image file using OCR (pytesseract)"""
-        try:
-            image = Image.open(file_path)
-            text = pytesseract.image_to_string(image)
-            return text
-        except Exception as e:
-            return f"Error extracting image text: {str(e)}"
-
-    def extract_receipt_data(self, file_path: str) -> str:
-        """
-        Extract text from receipt file based on file type
-        Supports PDF and image formats
-        """
-        file_extension = os.path.splitext(file_path)[1].lower()
-
-        if file_extension == '.pdf':
-            return self.extract_text_from_pdf(file_path)
-        elif file_extension in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']:
-            return self.extract_text_from_image(file_path)
-        else:
-            return "Unsupported file format"
+        client_kwargs = _openai_client_kwargs()
+        self.client = OpenAI(**client_kwargs)
+        self.async_client = AsyncOpenAI(**client_kwargs)
 
-    def validate_receipt_with_ai(
-        self,
-        receipt_text: str,
-        po_data: Dict[str, Any],
-        proforma_text: str = None
-    ) -> Dict[str, Any]:
-        """
-        Use OpenAI to validate receipt against PO data
-        Returns validation result with discrepancies flagged
-        """
+    def _validation_request(self, receipt_text: str, po_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the chat completion arguments for receipt validation"""
 
         # Construct the validation prompt
         prompt = f"""
@@ -79,14 +68,14 @@ You are a financial auditor validating a receipt against a purchase order (PO).
 - Title: {po_data.get('title', 'N/A')}
 - Description: {po_data.get('description', 'N/A')}
 - Approved Amount: ${po_data.get('amount', 'N/A')}
-
+{self._po_details_prompt(po_data.get('details'))}
 **Receipt Text Extracted:**
 {receipt_text}
 
 **Task:**
 Compare the receipt with the PO and validate the following:
-1. **Vendor/Seller**: Does the seller on the receipt match the vendor mentioned in the PO description or title?
-2. **Items**: Do the items on the receipt match the items described in the PO?
+1. **Vendor/Seller**: Does the seller on the receipt match the PO vendor (or the vendor mentioned in the PO description or title)?
+2. **Items**: Do the items on the receipt match the PO line items (or the items described in the PO)?
 3. **Prices**: Are the prices on the receipt consistent with the approved amount?
 4. **Total Amount**: Does the total on the receipt match or is close to the approved PO amount?
 
@@ -108,53 +97,123 @@ Compare the receipt with the PO and validate the following:
 Provide only the JSON output, no additional text.
 """
 
-        try:
-            # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a financial auditor validating receipts against purchase orders. Always respond in valid JSON format."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=1000
-            )
+        return dict(
+            model="gpt-4o-mini",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are a financial auditor validating receipts against purchase orders. Always respond in valid JSON format."
+                },
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=1000
+        )
 
-            # Extract and parse the response
-            validation_result = response.choices[0].message.content.strip()
-
-            # Try to parse as JSON (OpenAI should return JSON)
-            import json
-            try:
-                result_json = json.loads(validation_result)
-                return result_json
-            except json.JSONDecodeError:
-                # If not valid JSON, wrap in error response
-                return {
-                    "is_valid": False,
-                    "confidence_score": 0,
-                    "discrepancies": [
-                        {"type": "validation_error", "description": "Failed to parse AI response"}
-                    ],
-                    "extracted_data": {},
-                    "summary": "AI validation failed",
-                    "raw_response": validation_result
-                }
+    def _po_details_prompt(self, details) -> str:
+        """Vendor, line items and total of the stored PO for the prompt"""
+        if not details:
+            return ""
+        lines = [
+            f"- Vendor: {details['vendor']['name']}",
+            f"- PO Total: ${details['pricing']['total']}",
+            "- Line Items:",
+        ]
+        for item in details['items']:
+            lines.append(
+                f"  - {item['description']}: {item['quantity']} x ${item['unit_price']} = ${item['total']}"
+            )
+        return "\n".join(lines) + "\n"
 
-        except Exception as e:
+    def _parse_validation_response(self, validation_result: str) -> Dict[str, Any]:
+        # Try to parse as JSON (OpenAI should return JSON)
+        try:
+            return json.loads(validation_result)
+        except json.JSONDecodeError:
+            # If not valid JSON, wrap in error response
             return {
                 "is_valid": False,
                 "confidence_score": 0,
                 "discrepancies": [
-                    {"type": "system_error", "description": str(e)}
+                    {"type": "validation_error", "description": "Failed to parse AI response"}
                 ],
                 "extracted_data": {},
-                "summary": f"Validation error: {str(e)}"
+                "summary": "AI validation failed",
+                "raw_response": validation_result
             }
 
+    def _validation_error(self, e: Exception) -> Dict[str, Any]:
+        return {
+            "is_valid": False,
+            "confidence_score": 0,
+            "discrepancies": [
+                {"type": "system_error", "description": str(e)}
+            ],
+            "extracted_data": {},
+            "summary": f"Validation error: {str(e)}"
+        }
+
+    def validate_receipt_with_ai(
+        self,
+        receipt_text: str,
+        po_data: Dict[str, Any],
+        proforma_text: str = None
+    ) -> Dict[str, Any]:
+        """
+        Use OpenAI to validate receipt against PO data
+        Returns validation result with discrepancies flagged
+        """
+        try:
+            # Call OpenAI API
+            with metrics.span('openai.validate_receipt'):
+                response = self.client.chat.completions.create(**self._validation_request(receipt_text, po_data))
+            metrics.record_openai_usage('validate_receipt', response)
+            return self._parse_validation_response(response.choices[0].message.content.strip())
+        except Exception as e:
+            return self._validation_error(e)
+
+    async def avalidate_receipt_with_ai(
+        self,
+        receipt_text: str,
+        po_data: Dict[str, Any],
+        proforma_text: str = None
+    ) -> Dict[str, Any]:
+        """Async variant of validate_receipt_with_ai using the async OpenAI client"""
+        try:
+            with metrics.span('openai.validate_receipt'):
+                response = await self.async_client.chat.completions.create(**self._validation_request(receipt_text, po_data))
+            metrics.record_openai_usage('validate_receipt', response)
+            return self._parse_validation_response(response.choices[0].message.content.strip())
+        except Exception as e:
+            return self._validation_error(e)
+
+    def _extraction_failed(self, error: extraction.ExtractionError = None) -> Dict[str, Any]:
+        result = {
+            "is_valid": False,
+            "confidence_score": 0,
+            "discrepancies": [
+                {"type": "extraction_error", "description": str(error) if error else "Could not extract text from receipt"}
+            ],
+            "extracted_data": {},
+            "summary": "Receipt text extraction failed"
+        }
+        if error:
+            # timeout / resource_limit / too_large / failed: the receipt couldn't
+            # be read at all, which is not a verdict on the receipt
+            result["extraction_failure"] = error.code
+        return result
+
+    def _po_data(self, purchase_request) -> Dict[str, Any]:
+        return {
+            "title": purchase_request.title,
+            "description": purchase_request.description,
+            "amount": str(purchase_request.amount),
+            "status": purchase_request.status,
+            # Vendor / line items stored when the PO was generated, so the
+            # proforma never has to be extracted again here
+            "details": purchase_orders.load(purchase_request),
+        }
+
     def validate_receipt(self, receipt_file_path: str, purchase_request) -> Dict[str, Any]:
         """
         Main validation method
@@ -169,44 +228,41 @@ Provide only the JSON output, no additional text.
         """
 
         # Extract text from receipt
-        receipt_text = self.extract_receipt_data(receipt_file_path)
-
-        if "Error" in receipt_text or not receipt_text.strip():
-            return {
-                "is_valid": False,
-                "confidence_score": 0,
-                "discrepancies": [
-                    {"type": "extraction_error", "description": "Could not extract text from receipt"}
-                ],
-                "extracted_data": {},
-                "summary": "Receipt text extraction failed"
-            }
-
-        # Prepare PO data
-        po_data = {
-            "title": purchase_request.title,
-            "description": purchase_request.description,
-            "amount": str(purchase_request.amount),
-            "status": purchase_request.status
-        }
+        try:
+            receipt_text = extraction.extract_text(receipt_file_path)
+        except extraction.ExtractionError as e:
+            return self._extraction_failed(e)
 
-        # Extract proforma text if available (for additional context)
-        proforma_text = None
-        if purchase_request.proforma:
-            try:
-                proforma_path = purchase_request.proforma.path
-                proforma_text = self.extract_receipt_data(proforma_path)
-            except:
-                proforma_text = None
+        if not receipt_text.strip():
+            return self._extraction_failed()
+        events.publish_for(purchase_request, 'extracted')
 
         # Validate using AI
-        validation_result = self.validate_receipt_with_ai(
+        events.publish_for(purchase_request, 'validating')
+        return self.validate_receipt_with_ai(
             receipt_text=receipt_text,
-            po_data=po_data,
-            proforma_text=proforma_text
+            po_data=self._po_data(purchase_request)
         )
 
-        return validation_result
+    async def avalidate_receipt(self, receipt_file_path: str, purchase_request) -> Dict[str, Any]:
+        """
+        Async variant of validate_receipt: OCR/PDF extraction runs on the
+        blocking executor, the OpenAI call is awaited on the event loop
+        """
+        try:
+            receipt_text = await run_blocking(extraction.extract_text, receipt_file_path)
+        except extraction.ExtractionError as e:
+            return self._extraction_failed(e)
+
+        if not receipt_text.strip():
+            return self._extraction_failed()
+        await sync_to_async(events.publish_for)(purchase_request, 'extracted')
+
+        await sync_to_async(events.publish_for)(purchase_request, 'validating')
+        return await self.avalidate_receipt_with_ai(
+            receipt_text=receipt_text,
+            po_data=await sync_to_async(self._po_data)(purchase_request)
+        )
 
 
 class POGenerationService:
@@ -216,47 +272,16 @@ class POGenerationService:
     """
 
     def __init__(self):
-        api_key = os.environ.get('OPENAI_API_KEY')
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY environment variable is not set")
-        self.client = OpenAI(api_key=api_key)
+        from openai import OpenAI, AsyncOpenAI
 
-    def extract_text_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF file using pdfplumber"""
-        try:
-            with pdfplumber.open(file_path) as pdf:
-                text = ""
-                for page in pdf.pages:
-                    text += page.extract_text() or ""
-                return text
-        except Exception as e:
-            return f"Error extracting PDF text: {str(e)}"
+        client_kwargs = _openai_client_kwargs()
+        self.client = OpenAI(**client_kwargs)
+        self.async_client = AsyncOpenAI(**client_kwargs)
 
-    def extract_text_from_image(self, file_path: str) -> str:
-        """Extract text from image file using OCR (pytesseract)"""
-        try:
-            image = Image.open(file_path)
-            text = pytesseract.image_to_string(image)
-            return text
-        except Exception as e:
-            return f"Error extracting image text: {str(e)}"
-
-    def extract_proforma_data(self, file_path: str) -> str:
-        """Extract text from proforma file"""
-        file_extension = os.path.splitext(file_path)[1].lower()
-
-        if file_extension == '.pdf':
-            return self.extract_text_from_pdf(file_path)
-        elif file_extension in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']:
-            return self.extract_text_from_image(file_path)
-        else:
-            return "Unsupported file format"
-
-    def extract_po_data_with_ai(self, proforma_text: str, request_data: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Use OpenAI to extract structured PO data from proforma invoice
-        Returns vendor, items, prices, terms, and other PO details
-        """
+    def _po_extraction_request(self, proforma_text: str, request_data: Dict[str, Any], tables=None) -> Dict[str, Any]:
+        """Build the chat completion arguments for PO data extraction"""
+        if tables:
+            return self._po_gaps_request(proforma_text, request_data, tables)
 
         prompt = f"""
 You are a procurement specialist extracting information from a proforma invoice to create a Purchase Order.
@@ -308,32 +333,112 @@ Extract the following information to generate a Purchase Order:
 Provide only the JSON output, no additional text. If information is not available, use "N/A".
 """
 
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a procurement specialist. Extract structured data from proforma invoices and respond in valid JSON format only."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=1500
-            )
+        return dict(
+            model="gpt-4o-mini",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are a procurement specialist. Extract structured data from proforma invoices and respond in valid JSON format only."
+                },
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=1500
+        )
+
+    def _po_gaps_request(self, proforma_text: str, request_data: Dict[str, Any], tables: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Chat completion arguments asking only for what parsing the proforma's
+        tables (core.extraction.parse_tables) didn't find: proforma_text is
+        the text outside those tables, and items aren't asked for at all
+        """
+        missing_pricing = [key for key in PRICING_KEYS if key not in tables['pricing']]
+        pricing_task = ", the pricing lines: " + ", ".join(missing_pricing) if missing_pricing else ""
+        pricing_format = (
+            '\n    "pricing": {{{}}},'.format(", ".join(f'"{key}": "{key} amount"' for key in missing_pricing))
+            if missing_pricing else ""
+        )
+
+        prompt = f"""
+You are a procurement specialist extracting information from a proforma invoice to create a Purchase Order.
+
+**Purchase Request Information:**
+- Title: {request_data.get('title', 'N/A')}
+- Description: {request_data.get('description', 'N/A')}
+- Approved Amount: ${request_data.get('amount', 'N/A')}
+
+**Proforma Invoice Text (line items already extracted and left out):**
+{proforma_text}
+
+**Task:**
+Extract the vendor's company name, address and contact details{pricing_task}, the payment terms, delivery terms and validity period, and any notes.
+
+**Output Format (JSON):**
+{{
+    "vendor": {{"name": "Vendor company name", "address": "Vendor address", "contact": "Phone/email"}},{pricing_format}
+    "terms": {{"payment": "payment terms", "delivery": "delivery terms", "validity": "validity period"}},
+    "notes": "Any additional notes or special instructions"
+}}
 
-            result_text = response.choices[0].message.content.strip()
+Provide only the JSON output, no additional text. If information is not available, use "N/A".
+"""
+
+        return dict(
+            model="gpt-4o-mini",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are a procurement specialist. Extract structured data from proforma invoices and respond in valid JSON format only."
+                },
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=500
+        )
 
-            import json
-            try:
-                po_data = json.loads(result_text)
-                return po_data
-            except json.JSONDecodeError:
-                return {
-                    "error": "Failed to parse AI response",
-                    "raw_response": result_text
-                }
+    def _with_tables(self, po_data: Dict[str, Any], tables) -> Dict[str, Any]:
+        """Merge the locally parsed items / pricing into the AI's extraction"""
+        if not tables or po_data.get("error"):
+            return po_data
+        pricing = po_data.get("pricing") or {}
+        return {
+            **po_data,
+            "items": tables["items"],
+            "pricing": {key: tables["pricing"].get(key) or pricing.get(key, "N/A") for key in PRICING_KEYS},
+        }
+
+    def _parse_po_response(self, result_text: str) -> Dict[str, Any]:
+        try:
+            return json.loads(result_text)
+        except json.JSONDecodeError:
+            return {
+                "error": "Failed to parse AI response",
+                "raw_response": result_text
+            }
+
+    def extract_po_data_with_ai(self, proforma_text: str, request_data: Dict[str, Any], tables=None) -> Dict[str, Any]:
+        """
+        Use OpenAI to extract structured PO data from proforma invoice
+        Returns vendor, items, prices, terms, and other PO details.
+        With the proforma's parsed tables, OpenAI only fills in the rest
+        """
+        try:
+            with metrics.span('openai.extract_po'):
+                response = self.client.chat.completions.create(**self._po_extraction_request(proforma_text, request_data, tables))
+            metrics.record_openai_usage('extract_po', response)
+            return self._with_tables(self._parse_po_response(response.choices[0].message.content.strip()), tables)
+        except Exception as e:
+            return {
+                "error": f"AI extraction failed: {str(e)}"
+            }
 
+    async def aextract_po_data_with_ai(self, proforma_text: str, request_data: Dict[str, Any], tables=None) -> Dict[str, Any]:
+        """Async variant of extract_po_data_with_ai using the async OpenAI client"""
+        try:
+            with metrics.span('openai.extract_po'):
+                response = await self.async_client.chat.completions.create(**self._po_extraction_request(proforma_text, request_data, tables))
+            metrics.record_openai_usage('extract_po', response)
+            return self._with_tables(self._parse_po_response(response.choices[0].message.content.strip()), tables)
         except Exception as e:
             return {
                 "error": f"AI extraction failed: {str(e)}"
@@ -344,6 +449,11 @@ Provide only the JSON output, no additional text. If information is not availabl
         Generate a PDF Purchase Order document from extracted data
         Returns a BytesIO buffer containing the PDF
         """
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
@@ -465,14 +575,78 @@ Provide only the JSON output, no additional text. If information is not availabl
             story.append(Paragraph(f"<b>Request Description:</b> {request_data.get('description', 'N/A')}", styles['Normal']))
 
         # Build PDF
-        doc.build(story)
+        with metrics.span('render.reportlab'):
+            doc.build(story)
         buffer.seek(0)
         return buffer
 
+    def _request_data(self, purchase_request) -> Dict[str, Any]:
+        return {
+            "title": purchase_request.title,
+            "description": purchase_request.description,
+            "amount": str(purchase_request.amount)
+        }
+
+    def proforma_input(self, purchase_request):
+        """
+        (text, tables) to extract a request's PO data from, reusing what was
+        extracted at upload time: the text outside the proforma's line-item
+        tables plus the parsed tables when there are any, else the whole
+        text and None
+        """
+        tables = purchase_request.proforma_tables
+        if tables is None:
+            tables = extraction.extract_tables(purchase_request.proforma.path)
+        if tables.get('items'):
+            return tables['text'], tables
+        return purchase_request.proforma_text or extraction.extract_text(purchase_request.proforma.path), None
+
+    def _save_po_file(self, purchase_request, pdf_buffer: io.BytesIO) -> str:
+        po_filename = f"PO_{purchase_request.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        with metrics.span('db.save_purchase_order'):
+            purchase_request.purchase_order.save(
+                po_filename,
+                ContentFile(pdf_buffer.read()),
+                save=False
+            )
+            # Only the PO column changed; don't rewrite the rest of the row
+            purchase_request.save(update_fields=['purchase_order'])
+        events.publish_for(purchase_request, 'po_ready', po_file=purchase_request.purchase_order.name)
+        return purchase_request.purchase_order.name
+
+    def _store_po_data(self, purchase_request, po_data: Dict[str, Any]):
+        """Keep the extraction for validation / regeneration; never fails the PO"""
+        try:
+            with metrics.span('db.save_po_data'):
+                purchase_orders.store(purchase_request, po_data)
+        except Exception:
+            logger.exception("Storing extracted PO data for %s failed", purchase_request.id)
+
+    def regenerate_purchase_order(self, purchase_request) -> Dict[str, Any]:
+        """
+        Re-render the PO PDF from the stored extraction (core.purchase_orders)
+        without extracting the proforma or calling OpenAI again
+        """
+        result = {"success": False, "po_file": None, "extracted_data": None, "error": None}
+        try:
+            po_data = purchase_orders.load(purchase_request)
+            if po_data is None:
+                result["error"] = "No stored PO data; generate the PO from the proforma instead"
+                return result
+            result["extracted_data"] = po_data
+            pdf_buffer = self.generate_po_pdf(po_data, self._request_data(purchase_request))
+            result["po_file"] = self._save_po_file(purchase_request, pdf_buffer)
+            result["success"] = True
+        except Exception as e:
+            result["error"] = f"PO regeneration failed: {str(e)}"
+        return result
+
     def generate_purchase_order(self, purchase_request) -> Dict[str, Any]:
         """
         Main method to generate PO from purchase request
-        Extracts data from proforma, generates PDF PO, and saves it
+        Extracts data from proforma, generates PDF PO, and saves it.
+        Text / PO data already extracted at upload time (core.tasks.extract_proforma)
+        is reused, so then only the PDF is rendered
 
         Args:
             purchase_request: PurchaseRequest model instance
@@ -495,40 +669,80 @@ Provide only the JSON output, no additional text. If information is not availabl
                 result["success"] = False
                 return result
 
-            # Extract text from proforma
-            proforma_path = purchase_request.proforma.path
-            proforma_text = self.extract_proforma_data(proforma_path)
-
-            if "Error" in proforma_text or not proforma_text.strip():
-                result["error"] = "Could not extract text from proforma"
-                result["success"] = False
-                return result
-
             # Prepare request data
-            request_data = {
-                "title": purchase_request.title,
-                "description": purchase_request.description,
-                "amount": str(purchase_request.amount)
-            }
-
-            # Extract PO data using AI
-            po_data = self.extract_po_data_with_ai(proforma_text, request_data)
+            request_data = self._request_data(purchase_request)
+
+            # Use the PO data pre-extracted at upload time when there is some
+            po_data = purchase_orders.load(purchase_request)
+            if po_data is None:
+                # Extract text / tables from proforma, unless done at upload time
+                proforma_text, tables = self.proforma_input(purchase_request)
+
+                if not tables and not proforma_text.strip():
+                    result["error"] = "Could not extract text from proforma"
+                    result["success"] = False
+                    return result
+
+                # Extract PO data using AI
+                po_data = self.extract_po_data_with_ai(proforma_text, request_data, tables)
+                self._store_po_data(purchase_request, po_data)
             result["extracted_data"] = po_data
 
             # Generate PDF PO
             pdf_buffer = self.generate_po_pdf(po_data, request_data)
 
             # Save PO file
-            po_filename = f"PO_{purchase_request.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            purchase_request.purchase_order.save(
-                po_filename,
-                ContentFile(pdf_buffer.read()),
-                save=True
-            )
+            result["po_file"] = self._save_po_file(purchase_request, pdf_buffer)
+            result["success"] = True
+
+        except extraction.ExtractionError as e:
+            result["error"] = f"Could not extract text from proforma: {e}"
+            result["extraction_failure"] = e.code
+        except Exception as e:
+            result["error"] = f"PO generation failed: {str(e)}"
+            result["success"] = False
+
+        return result
+
+    async def agenerate_purchase_order(self, purchase_request) -> Dict[str, Any]:
+        """
+        Async variant of generate_purchase_order. Text extraction and PDF
+        rendering run on the blocking executor, the OpenAI call is awaited,
+        and the file/row write goes through sync_to_async
+        """
+
+        result = {
+            "success": False,
+            "po_file": None,
+            "extracted_data": None,
+            "error": None
+        }
+
+        try:
+            if not purchase_request.proforma:
+                result["error"] = "No proforma invoice attached"
+                return result
+
+            request_data = self._request_data(purchase_request)
+            po_data = await sync_to_async(purchase_orders.load)(purchase_request)
+            if po_data is None:
+                proforma_text, tables = await run_blocking(self.proforma_input, purchase_request)
+
+                if not tables and not proforma_text.strip():
+                    result["error"] = "Could not extract text from proforma"
+                    return result
+
+                po_data = await self.aextract_po_data_with_ai(proforma_text, request_data, tables)
+                await sync_to_async(self._store_po_data)(purchase_request, po_data)
+            result["extracted_data"] = po_data
 
+            pdf_buffer = await run_blocking(self.generate_po_pdf, po_data, request_data)
+            result["po_file"] = await sync_to_async(self._save_po_file)(purchase_request, pdf_buffer)
             result["success"] = True
-            result["po_file"] = purchase_request.purchase_order.name
 
+        except extraction.ExtractionError as e:
+            result["error"] = f"Could not extract text from proforma: {e}"
+            result["extraction_failure"] = e.code
         except Exception as e:
             result["error"] = f"PO generation failed: {str(e)}"
             result["success"] = False
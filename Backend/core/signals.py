@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from core import summary
+from core.models import PurchaseRequest
+
+
+@receiver(post_delete, sender=PurchaseRequest)
+def remove_from_summary(sender, instance, **kwargs):
+    # Runs inside the deleting transaction, for cascaded deletes too
+    summary.record_deleted(instance)
@@ -0,0 +1,151 @@
+"""
+Incremental maintenance of the PurchaseRequestSummary table.
+
+Every function here must be called inside the transaction that writes the
+purchase request itself, so the summary can never drift from the rows it
+describes. Deletes (admin, or cascading from a StaffMember / User) are
+recorded by the post_delete receiver in core.signals. `rebuild` and
+`verify` recompute the buckets from scratch.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from core.models import PurchaseRequest, PurchaseRequestSummary
+
+
+def _month(created_at):
+    return timezone.localtime(created_at).date().replace(day=1)
+
+
+def _apply(status, month, requester_id, count_delta, amount_delta):
+    bucket = PurchaseRequestSummary.objects.filter(status=status, month=month, requester_id=requester_id)
+    delta = dict(
+        request_count=F('request_count') + count_delta,
+        total_amount=F('total_amount') + amount_delta,
+    )
+    if bucket.update(**delta):
+        return
+    try:
+        with transaction.atomic():
+            PurchaseRequestSummary.objects.create(
+                status=status,
+                month=month,
+                requester_id=requester_id,
+                request_count=count_delta,
+                total_amount=amount_delta,
+            )
+    except IntegrityError:
+        # Another transaction created the bucket first
+        bucket.update(**delta)
+
+
+def record_created(pr: PurchaseRequest):
+    _apply(pr.status, _month(pr.created_at), pr.created_by_id, 1, pr.amount)
+
+
+def record_transition(pr: PurchaseRequest, from_status: str, to_status: str):
+    if from_status == to_status:
+        return
+    month = _month(pr.created_at)
+    _apply(from_status, month, pr.created_by_id, -1, -pr.amount)
+    _apply(to_status, month, pr.created_by_id, 1, pr.amount)
+
+
+def record_bulk_transition(requests, from_status: str, to_status: str):
+    """Apply a batch of transitions with one delta per affected bucket."""
+    if from_status == to_status:
+        return
+    deltas = {}
+    for pr in requests:
+        key = (_month(pr.created_at), pr.created_by_id)
+        count, amount = deltas.get(key, (0, Decimal('0')))
+        deltas[key] = (count + 1, amount + pr.amount)
+    for (month, requester_id), (count, amount) in deltas.items():
+        _apply(from_status, month, requester_id, -count, -amount)
+        _apply(to_status, month, requester_id, count, amount)
+
+
+def record_deleted(pr: PurchaseRequest):
+    """
+    Take a deleted request out of its bucket. Only decrements: when the
+    requester itself is deleted their buckets cascade away, possibly
+    before their requests, and there is nothing left to correct.
+    """
+    PurchaseRequestSummary.objects.filter(
+        status=pr.status, month=_month(pr.created_at), requester_id=pr.created_by_id
+    ).update(request_count=F('request_count') - 1, total_amount=F('total_amount') - pr.amount)
+
+
+def record_amount_change(pr: PurchaseRequest, old_amount: Decimal):
+    if old_amount == pr.amount:
+        return
+    _apply(pr.status, _month(pr.created_at), pr.created_by_id, 0, pr.amount - old_amount)
+
+
+def _computed_buckets():
+    rows = (
+        PurchaseRequest.objects.order_by()
+        .annotate(month=TruncMonth('created_at', output_field=DateField()))
+        .values('status', 'month', 'created_by_id')
+        .annotate(request_count=Count('id'), total_amount=Sum('amount'))
+    )
+    return {
+        (row['status'], row['month'], row['created_by_id']): (row['request_count'], row['total_amount'])
+        for row in rows
+    }
+
+
+def _stored_buckets():
+    # Emptied buckets are left behind as zero rows; anything else, negative
+    # counts included, has to match the aggregate
+    rows = PurchaseRequestSummary.objects.exclude(request_count=0, total_amount=0).values_list(
+        'status', 'month', 'requester_id', 'request_count', 'total_amount'
+    )
+    return {(s, m, r): (count, amount) for s, m, r, count, amount in rows}
+
+
+def rebuild() -> int:
+    """Recompute every bucket from PurchaseRequest. Returns the bucket count."""
+    with transaction.atomic():
+        # Block concurrent request writes so the snapshot can't miss a delta
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {PurchaseRequest._meta.db_table} IN SHARE MODE')
+        PurchaseRequestSummary.objects.all().delete()
+        buckets = [
+            PurchaseRequestSummary(
+                status=status,
+                month=month,
+                requester_id=requester_id,
+                request_count=count,
+                total_amount=amount,
+            )
+            for (status, month, requester_id), (count, amount) in _computed_buckets().items()
+        ]
+        PurchaseRequestSummary.objects.bulk_create(buckets, batch_size=1000)
+    return len(buckets)
+
+
+def verify() -> list:
+    """
+    Compare the summary table with a fresh aggregate.
+    Returns a list of (bucket, stored, expected) tuples that disagree.
+    Inside an existing transaction both reads use that transaction's
+    isolation level.
+    """
+    outermost = not connection.in_atomic_block
+    with transaction.atomic():
+        if outermost:
+            # Both reads must see the same snapshot
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        expected = _computed_buckets()
+        stored = _stored_buckets()
+    mismatches = []
+    for key in expected.keys() | stored.keys():
+        if stored.get(key) != expected.get(key):
+            mismatches.append((key, stored.get(key), expected.get(key)))
+    return mismatches
@@ -0,0 +1,103 @@
+"""
+Minimal in-process background queue.
+
+Work is handed to a small thread pool once the surrounding transaction
+commits, so request handlers can return without waiting on slow AI/PDF
+work. Tasks must be idempotent: a worker restart drops anything queued.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'BACKGROUND_TASK_WORKERS', 2),
+    thread_name_prefix='core-task',
+)
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", func.__name__)
+    finally:
+        close_old_connections()
+
+
+def enqueue(func, *args, **kwargs):
+    """Schedule func(*args, **kwargs) to run after the current transaction commits."""
+    transaction.on_commit(lambda: _executor.submit(_run, func, args, kwargs))
+
+
+def generate_purchase_orders(request_ids):
+    """Generate POs for a batch of approved requests, sharing one AI client."""
+    from core.models import PurchaseRequest
+    from core.services import POGenerationService
+
+    po_service = POGenerationService()
+    for pr in PurchaseRequest.objects.filter(id__in=request_ids, status=PurchaseRequest.APPROVED):
+        result = po_service.generate_purchase_order(pr)
+        if not result["success"]:
+            logger.warning("PO generation for %s failed: %s", pr.id, result.get("error"))
+
+
+def extract_proforma(request_id):
+    """
+    Extract a pending request's proforma tables and text right after
+    upload and, with PROFORMA_AI_PREEXTRACT, its structured PO data, so
+    approve doesn't pay for OCR / OpenAI. Results are dropped if the request was edited or
+    decided in the meantime (the edit schedules its own extraction).
+    """
+    from core import extraction, purchase_orders
+    from core.models import PurchaseOrder, PurchaseRequest
+    from core.services import POGenerationService
+
+    pr = PurchaseRequest.objects.filter(id=request_id, status=PurchaseRequest.PENDING).first()
+    if pr is None or not pr.proforma:
+        return
+    # Row versions: every save bumps timestamps (QuerySet.update doesn't)
+    unchanged = PurchaseRequest.objects.filter(id=pr.id, status=PurchaseRequest.PENDING, timestamps=pr.timestamps)
+    po_service = POGenerationService()
+
+    if pr.proforma_tables is None:
+        try:
+            tables = extraction.extract_tables(pr.proforma.path)
+        except extraction.ExtractionError as e:
+            logger.warning("Proforma table extraction for %s failed (%s): %s", pr.id, e.code, e)
+            return
+        if not unchanged.update(proforma_tables=tables):
+            return
+        pr.proforma_tables = tables
+
+    # Parsed line items carry everything the full text would be needed for
+    if not pr.proforma_tables.get('items') and not pr.proforma_text:
+        try:
+            text = extraction.extract_text(pr.proforma.path)
+        except extraction.ExtractionError as e:
+            logger.warning("Proforma extraction for %s failed (%s): %s", pr.id, e.code, e)
+            return
+        if not text.strip():
+            logger.warning("Proforma extraction for %s found no text", pr.id)
+            return
+        # Postgres text columns can't hold NUL, which some PDFs produce
+        text = text.replace("\x00", "")
+        if not unchanged.update(proforma_text=text):
+            return
+        pr.proforma_text = text
+
+    if not settings.PROFORMA_AI_PREEXTRACT or PurchaseOrder.objects.filter(purchase_request=pr).exists():
+        return
+    proforma_text, tables = po_service.proforma_input(pr)
+    po_data = po_service.extract_po_data_with_ai(proforma_text, po_service._request_data(pr), tables)
+    if po_data.get("error"):
+        logger.warning("PO pre-extraction for %s failed: %s", pr.id, po_data["error"])
+        return
+    with transaction.atomic():
+        # Same row lock as PurchaseRequestViewSet.update, so an edit can't slip in between
+        if unchanged.select_for_update().exists():
+            purchase_orders.store(pr, po_data)
@@ -1,3 +1,550 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import subprocess
+import tempfile
+import time
+import uuid
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.postgres.search import SearchQuery
+from django.core.handlers.base import BaseHandler
+from django.core.management import CommandError, call_command
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.http import StreamingHttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from core import db_router, extraction, purchase_orders, sandbox, summary
+from core.models import PurchaseOrder, PurchaseRequest, PurchaseRequestSummary
+from core.serializers import CustomTokenObtainPairSerializer
+
+
+def create_user(name, user_type):
+    return User.objects.create_user(f'{name}@example.com', name, name.title(), password='p', user_type=user_type)
+
+
+def api_client(user):
+    """APIClient sending a real access token, so requests go through StatelessJWTAuthentication"""
+    client = APIClient()
+    token = CustomTokenObtainPairSerializer.get_token(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f'JWT {token}')
+    return client
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN plans are Postgres-specific')
+class PurchaseRequestIndexPlanTests(TestCase):
+    """The list view's hot query shapes are served by the indexes declared on PurchaseRequest"""
+
+    @classmethod
+    def setUpTestData(cls):
+        staff = [
+            User.objects.create_user(f'staff{i}@example.com', f'staff{i}', f'Staff {i}', password='p', user_type=User.STAFF)
+            for i in range(4)
+        ]
+        cls.requester = staff[0].staff_profile
+        statuses = [PurchaseRequest.APPROVED, PurchaseRequest.REJECTED, PurchaseRequest.APPROVED, PurchaseRequest.PENDING]
+        PurchaseRequest.objects.bulk_create([
+            PurchaseRequest(
+                title=f"Laptop order {i}" if i % 50 == 0 else f"Office chairs {i}",
+                description="Replacement equipment for the team",
+                amount=Decimal(100 + i),
+                status=statuses[i % len(statuses)] if i % 20 else PurchaseRequest.PENDING,
+                created_by=staff[i % len(staff)].staff_profile,
+            )
+            for i in range(4000)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {PurchaseRequest._meta.db_table}')
+
+    def setUp(self):
+        # The test table is small enough for a sequential scan to win on
+        # cost; rule it out so the plan shows which index matches the query
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, plan)
+
+    def test_pending_queue_uses_partial_index(self):
+        queryset = PurchaseRequest.objects.filter(status=PurchaseRequest.PENDING).order_by('-created_at')[:20]
+        self.assertUsesIndex(queryset, 'pr_pending_created_idx')
+
+    def test_staff_list_uses_creator_index(self):
+        queryset = PurchaseRequest.objects.filter(created_by=self.requester).order_by('-created_at')[:20]
+        self.assertUsesIndex(queryset, 'pr_creator_created_idx')
+
+    def test_search_uses_gin_index(self):
+        query = SearchQuery('laptop', config='english', search_type='websearch')
+        self.assertUsesIndex(PurchaseRequest.objects.filter(search_vector=query), 'pr_search_vector_gin')
+
+
+class StartupBudgetTests(SimpleTestCase):
+    def test_startup_is_within_budget(self):
+        # import_profile times fresh interpreters and fails over
+        # STARTUP_TIME_BUDGET_MS / STARTUP_RSS_BUDGET_MB or on eager
+        # imports of LAZY_IMPORT_MODULES
+        try:
+            call_command('import_profile', top=0, stdout=StringIO())
+        except CommandError as e:
+            self.fail(str(e))
+
+
+class AsgiMiddlewareChainTests(SimpleTestCase):
+    @override_settings(DEBUG=True)
+    def test_async_chain_needs_no_thread_adapters(self):
+        # With DEBUG on, Django logs every sync/async adapter it has to put
+        # around a middleware; one would hold a thread per async request
+        with self.assertNoLogs('django.request', level='DEBUG'):
+            BaseHandler().load_middleware(is_async=True)
+
+
+class TransitionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = create_user('staff', User.STAFF)
+        cls.manager = create_user('manager', User.MANAGEMENT)
+
+    def setUp(self):
+        self.manager_client = api_client(self.manager)
+
+    def create_request(self, **fields):
+        return PurchaseRequest.objects.create(
+            title='Office chairs', description='Replacement equipment', amount=Decimal('250.00'),
+            created_by=self.staff.staff_profile, **fields,
+        )
+
+    def test_approve(self):
+        pr = self.create_request()
+        response = self.manager_client.patch(f'/api/requests/{pr.id}/approve/')
+        self.assertEqual(response.status_code, 200, response.data)
+        pr.refresh_from_db()
+        self.assertEqual(pr.status, PurchaseRequest.APPROVED)
+        self.assertEqual(pr.approved_by, self.manager.manager_profile)
+
+    def test_second_approve_conflicts(self):
+        pr = self.create_request()
+        self.manager_client.patch(f'/api/requests/{pr.id}/approve/')
+        response = self.manager_client.patch(f'/api/requests/{pr.id}/approve/')
+        self.assertEqual(response.status_code, 409)
+
+    def test_reject_after_approve_conflicts(self):
+        pr = self.create_request()
+        self.manager_client.patch(f'/api/requests/{pr.id}/approve/')
+        response = self.manager_client.patch(f'/api/requests/{pr.id}/reject/')
+        self.assertEqual(response.status_code, 409)
+        pr.refresh_from_db()
+        self.assertEqual(pr.status, PurchaseRequest.APPROVED)
+
+    def test_unknown_request(self):
+        response = self.manager_client.patch(f'/api/requests/{uuid.uuid4()}/approve/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_non_manager_is_forbidden(self):
+        pr = self.create_request()
+        staff_client = api_client(self.staff)
+        for path in (f'/api/requests/{pr.id}/approve/', f'/api/requests/{pr.id}/reject/'):
+            self.assertEqual(staff_client.patch(path).status_code, 403)
+        response = staff_client.post('/api/requests/bulk-approve/', {'ids': [str(pr.id)]}, format='json')
+        self.assertEqual(response.status_code, 403)
+        pr.refresh_from_db()
+        self.assertEqual(pr.status, PurchaseRequest.PENDING)
+
+    def test_bulk_approve_reports_each_id(self):
+        pending = self.create_request()
+        approved = self.create_request(status=PurchaseRequest.APPROVED)
+        unknown = uuid.uuid4()
+
+        with mock.patch('core.tasks.enqueue') as enqueue:
+            response = self.manager_client.post(
+                '/api/requests/bulk-approve/',
+                {'ids': [str(pending.id), str(approved.id), str(unknown)]},
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        outcomes = {result['id']: result['outcome'] for result in response.data['results']}
+        self.assertEqual(outcomes, {
+            str(pending.id): 'approved',
+            str(approved.id): 'not_pending',
+            str(unknown): 'not_found',
+        })
+        self.assertEqual(response.data['po_generation_queued'], 1)
+        enqueue.assert_called_once()
+        self.assertEqual(enqueue.call_args.args[1], [pending.id])
+
+    def test_bulk_reject_reports_each_id(self):
+        pending = self.create_request()
+        rejected = self.create_request(status=PurchaseRequest.REJECTED)
+        response = self.manager_client.post(
+            '/api/requests/bulk-reject/', {'ids': [str(pending.id), str(rejected.id)]}, format='json',
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual([result['outcome'] for result in response.data['results']], ['rejected', 'not_pending'])
+        self.assertEqual(response.data['po_generation_queued'], 0)
+
+
+class SummaryTests(TestCase):
+    def test_incremental_buckets_match_aggregate(self):
+        staff = create_user('staff', User.STAFF)
+        manager = create_user('manager', User.MANAGEMENT)
+        staff_client, manager_client = api_client(staff), api_client(manager)
+
+        ids = []
+        for amount in ('100.00', '250.00', '40.00', '75.50'):
+            response = staff_client.post('/api/requests/', {
+                'title': 'Office chairs', 'description': 'Replacement equipment', 'amount': amount,
+            })
+            self.assertEqual(response.status_code, 201, response.data)
+            ids.append(response.data['id'])
+        self.assertEqual(staff_client.put(f'/api/requests/{ids[0]}/', {'amount': '120.00'}).status_code, 200)
+        self.assertEqual(manager_client.patch(f'/api/requests/{ids[1]}/approve/').status_code, 200)
+        self.assertEqual(manager_client.patch(f'/api/requests/{ids[2]}/reject/').status_code, 200)
+        PurchaseRequest.objects.get(id=ids[3]).delete()
+
+        self.assertEqual(summary.verify(), [])
+        self.assertEqual(
+            sum(PurchaseRequestSummary.objects.values_list('request_count', flat=True)), 3,
+        )
+
+    def test_delete_from_drifted_bucket(self):
+        staff = create_user('staff', User.STAFF)
+        pr = PurchaseRequest.objects.create(
+            title='Office chairs', description='Replacement equipment', amount=Decimal('10.00'),
+            created_by=staff.staff_profile,
+        )
+        summary.record_created(pr)
+        # Drift: the bucket lost track of the request
+        PurchaseRequestSummary.objects.update(request_count=0, total_amount=0)
+        pr.delete()
+        self.assertEqual(len(summary.verify()), 1)
+        summary.rebuild()
+        self.assertEqual(summary.verify(), [])
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = create_user('staff', User.STAFF)
+        cls.other = create_user('other', User.STAFF)
+        for creator in (cls.staff, cls.other):
+            for title, amount, status in (
+                ('Laptop for design', '1200.00', PurchaseRequest.APPROVED),
+                ('Laptop stand', '80.00', PurchaseRequest.APPROVED),
+                ('Office chairs', '640.00', PurchaseRequest.PENDING),
+            ):
+                PurchaseRequest.objects.create(
+                    title=title, description='Equipment', amount=Decimal(amount), status=status,
+                    created_by=creator.staff_profile,
+                )
+
+    def setUp(self):
+        self.client = api_client(self.staff)
+
+    def export(self, **params):
+        response = self.client.get('/api/requests/export/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        response, body = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment; filename="purchase_requests_', response['Content-Disposition'])
+        rows = list(csv.DictReader(body.splitlines()))
+        self.assertEqual(list(rows[0]), ['id', 'title', 'description', 'amount', 'status', 'requester',
+                                         'approver', 'created_at', 'updated_at', 'receipt_validation_status'])
+        # Staff only get their own requests
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({row['requester'] for row in rows}, {'staff'})
+
+    def test_ndjson(self):
+        response, body = self.export(export_format='ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = body.splitlines()
+        self.assertEqual(len(lines), 3)
+        row = json.loads(lines[0])
+        self.assertEqual(row['requester'], 'staff')
+        self.assertEqual(Decimal(row['amount']), PurchaseRequest.objects.get(id=row['id']).amount)
+
+    def test_applies_list_filters(self):
+        params = {'status': PurchaseRequest.APPROVED, 'min_amount': '100', 'q': 'laptop'}
+        listed = self.client.get('/api/requests/', params)
+        self.assertEqual(listed.status_code, 200)
+        _, body = self.export(export_format='ndjson', **params)
+        exported = [json.loads(line)['id'] for line in body.splitlines()]
+        self.assertEqual(exported, [row['id'] for row in listed.data])
+        self.assertEqual(len(exported), 1)
+
+
+def pdf_file(test, lines=(), table=None):
+    """
+    Write a one-page PDF with text `lines` and, optionally, `table` (rows
+    of cells) drawn as a ruled grid below them; returns its path
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+    buffer = io.BytesIO()
+    style = getSampleStyleSheet()['Normal']
+    flowables = [Paragraph(line, style) for line in lines]
+    if table:
+        grid = Table(table)
+        grid.setStyle(TableStyle([('GRID', (0, 0), (-1, -1), 0.5, (0, 0, 0))]))
+        flowables.append(grid)
+    SimpleDocTemplate(buffer, pagesize=letter).build(flowables)
+
+    fd, path = tempfile.mkstemp(suffix='.pdf')
+    with os.fdopen(fd, 'wb') as fh:
+        fh.write(buffer.getvalue())
+    test.addCleanup(os.remove, path)
+    return path
+
+
+class PdfRoutingTests(SimpleTestCase):
+    def test_text_pdf_uses_pypdf(self):
+        path = pdf_file(self, ["Proforma invoice 1042 from Acme Supplies Ltd", "Office chairs, 4 units at 150.00"])
+        engine, reason, text, pages = extraction._route_pdf(path)
+        self.assertEqual((engine, reason, pages), ('pypdf', 'text', 1))
+        self.assertIn('Acme Supplies', text)
+
+    def test_ruled_table_uses_pdfplumber(self):
+        path = pdf_file(self, ["Proforma invoice 1042"], table=[['Description', 'Qty'], ['Office chair', '4']])
+        engine, reason, text, _ = extraction._route_pdf(path)
+        self.assertEqual((engine, reason), ('pdfplumber', 'tables'))
+        self.assertIn('Office chair', text)
+
+    def test_blank_pdf_falls_back_to_pdfplumber(self):
+        engine, reason, _, _ = extraction._route_pdf(pdf_file(self, ["."]))
+        self.assertEqual((engine, reason), ('pdfplumber', 'sparse'))
+
+
+class ParseTablesTests(SimpleTestCase):
+    LINES = ["Acme Supplies Ltd, 12 Mill Road", "Payment: net 30 days"]
+    TABLE = [
+        ['Description', 'Qty', 'Unit price', 'Total'],
+        ['Office chair', '4', '150.00', '600.00'],
+        ['Desk lamp', '2', '$25.50', '51.00'],
+        ['Subtotal', '', '', '651.00'],
+        ['VAT 16%', '', '', '104.16'],
+    ]
+
+    def test_items_and_pricing_come_from_the_table(self):
+        parsed = extraction.parse_tables(pdf_file(self, self.LINES + ["Grand total: $755.16"], self.TABLE))
+        self.assertEqual(parsed['items'], [
+            {"description": "Office chair", "quantity": "4", "unit_price": "150.00", "total": "600.00"},
+            {"description": "Desk lamp", "quantity": "2", "unit_price": "25.50", "total": "51.00"},
+        ])
+        self.assertEqual(parsed['pricing'], {"subtotal": "651.00", "tax": "104.16", "total": "755.16"})
+        # The rest of the page is left for the LLM, without the parsed table
+        self.assertIn("Acme Supplies Ltd", parsed['text'])
+        self.assertIn("Payment: net 30 days", parsed['text'])
+        self.assertNotIn("Office chair", parsed['text'])
+
+    def test_unrecognised_table_stays_in_the_text(self):
+        parsed = extraction.parse_tables(pdf_file(self, self.LINES, [['Ref', 'Date'], ['PO-7', '2026-01-05']]))
+        self.assertEqual((parsed['items'], parsed['pricing']), ([], {}))
+        self.assertIn("PO-7", parsed['text'])
+
+    def test_extract_tables_runs_in_the_sandbox(self):
+        path = pdf_file(self, self.LINES, self.TABLE)
+        self.assertEqual(extraction.extract_tables(path), extraction.parse_tables(path))
+
+    def test_extract_tables_skips_images(self):
+        self.assertEqual(extraction.extract_tables('receipt.jpg'), {})
+
+
+class PurchaseOrderStorageTests(TestCase):
+    def setUp(self):
+        self.pr = PurchaseRequest.objects.create(
+            title='Office chairs', description='Replacement equipment', amount=Decimal('1234.50'),
+            created_by=create_user('staff', User.STAFF).staff_profile,
+        )
+
+    def test_round_trip(self):
+        order = purchase_orders.store(self.pr, {
+            "vendor": {"name": "V" * 300, "address": "12 Mill Road", "contact": "N/A"},
+            "items": [
+                {"description": "Office chair", "quantity": "3 units", "unit_price": "$411.50", "total": "1,234.50"},
+                {"description": "", "quantity": "N/A", "unit_price": "free", "total": "123,456,789,012,345.00"},
+                "not an item",
+            ],
+            "pricing": {"subtotal": "1,234.50", "tax": None, "shipping": 0, "total": "USD 1,234.50"},
+            "terms": {"payment": "Net 30", "delivery": "", "validity": "P" * 300},
+            "notes": "Deliver to the loading bay",
+        })
+        self.assertEqual(order.total, Decimal('1234.50'))
+        self.assertEqual(len(order.vendor_name), PurchaseOrder._meta.get_field('vendor_name').max_length)
+
+        loaded = purchase_orders.load(self.pr)
+        self.assertEqual(loaded['vendor'], {"name": "V" * 255, "address": "12 Mill Road", "contact": "N/A"})
+        self.assertEqual(loaded['items'], [
+            {"description": "Office chair", "quantity": "3", "unit_price": "411.50", "total": "1234.50"},
+            {"description": "N/A", "quantity": "N/A", "unit_price": "N/A", "total": "N/A"},
+        ])
+        self.assertEqual(loaded['pricing'], {"subtotal": "1234.50", "tax": "N/A", "shipping": "0.00", "total": "1234.50"})
+        self.assertEqual(loaded['terms'], {"payment": "Net 30", "delivery": "N/A", "validity": "P" * 255})
+        self.assertEqual(loaded['notes'], "Deliver to the loading bay")
+
+        # Storing what was loaded changes nothing
+        purchase_orders.store(self.pr, loaded)
+        self.assertEqual(purchase_orders.load(self.pr), loaded)
+        self.assertEqual(PurchaseOrder.objects.get(purchase_request=self.pr).items.count(), 2)
+
+    def test_failed_extraction_is_not_stored(self):
+        self.assertIsNone(purchase_orders.store(self.pr, {"error": "No proforma text"}))
+        self.assertIsNone(purchase_orders.load(self.pr))
+
+
+def _process_gone(pid):
+    try:
+        with open(f'/proc/{pid}/stat') as fh:
+            # Reparented zombies count as gone
+            return fh.read().split(')')[-1].split()[0] == 'Z'
+    except FileNotFoundError:
+        return True
+
+
+@skipUnless(os.path.isdir('/proc'), 'the sandbox limits are Linux-specific')
+@override_settings(EXTRACTION_SANDBOX=True)
+class SandboxLimitTests(SimpleTestCase):
+    # Targets are stdlib callables: the child unpickles them without
+    # setting up Django, so this module can't provide them
+
+    def run_failing(self, func, *args):
+        started = time.monotonic()
+        with self.assertRaises(extraction.ExtractionError) as caught:
+            sandbox.run(func, *args)
+        return caught.exception, time.monotonic() - started
+
+    @override_settings(EXTRACTION_TIMEOUT=1, EXTRACTION_CPU_SECONDS=30)
+    def test_timeout_kills_the_process_group(self):
+        fd, pid_path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, pid_path)
+
+        # A CPU-bound shell with a background subprocess of its own
+        script = f'sleep 60 & echo $! > {pid_path}; while :; do :; done'
+        error, elapsed = self.run_failing(subprocess.call, ['sh', '-c', script])
+        self.assertEqual(error.code, 'timeout')
+        # The forkserver starts on first use, so allow for that on top of the limit
+        self.assertLess(elapsed, 1 + 3)
+        with open(pid_path) as fh:
+            helper = int(fh.read())
+        for _ in range(50):
+            if _process_gone(helper):
+                break
+            time.sleep(0.05)
+        self.assertTrue(_process_gone(helper), "the target's subprocess outlived the timeout")
+
+    @override_settings(EXTRACTION_TIMEOUT=30, EXTRACTION_CPU_SECONDS=1)
+    def test_cpu_limit(self):
+        error, elapsed = self.run_failing(sum, range(10 ** 12))
+        self.assertEqual(error.code, 'resource_limit')
+        self.assertLess(elapsed, 10)
+
+    @override_settings(EXTRACTION_MEMORY_MB=1536)
+    def test_memory_limit(self):
+        error, _ = self.run_failing(bytearray, 4 * 1024 ** 3)
+        self.assertEqual(error.code, 'resource_limit')
+
+    def test_result_comes_back(self):
+        self.assertEqual(sandbox.run(sum, range(5)), 10)
+
+
+class ReadReplicaRoutingTests(TestCase):
+    """
+    Runs with a `replica` alias mirroring the test database. It is a second
+    connection outside the test transaction, so it can't see the test's
+    rows; the tests check where queries go, not what they return.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # The test runner sets databases up before any test class runs, so
+        # unless the suite already has a replica, add the mirror alias now.
+        # connections.settings is settings.DATABASES, so this also makes
+        # replica_configured() true.
+        cls.added_replica = db_router.REPLICA not in connections.settings
+        if cls.added_replica:
+            connections.settings[db_router.REPLICA] = {
+                **connections[DEFAULT_DB_ALIAS].settings_dict,
+                'TEST': {**connections[DEFAULT_DB_ALIAS].settings_dict['TEST'], 'MIRROR': DEFAULT_DB_ALIAS},
+            }
+        cls.databases = {DEFAULT_DB_ALIAS, db_router.REPLICA}
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.added_replica:
+            connections[db_router.REPLICA].close()
+            del connections[db_router.REPLICA]
+            del connections.settings[db_router.REPLICA]
+        cls.databases = {DEFAULT_DB_ALIAS}
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = create_user('manager', User.MANAGEMENT)
+        cls.pr = PurchaseRequest.objects.create(
+            title='Office chairs', description='Replacement equipment', amount=Decimal('250.00'),
+            created_by=create_user('staff', User.STAFF).staff_profile,
+        )
+
+    def setUp(self):
+        cache.clear()
+        # A fresh client loads ReadYourWritesMiddleware with the replica configured
+        self.client = api_client(self.manager)
+
+    def request_tables(self, send, model=PurchaseRequest):
+        """Whether model's table was queried on (default, replica) while send() runs"""
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as primary, \
+                CaptureQueriesContext(connections[db_router.REPLICA]) as replica:
+            response = send()
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 400, getattr(response, 'data', None))
+        table = connection.ops.quote_name(model._meta.db_table)
+        return (
+            any(table in query['sql'] for query in primary.captured_queries),
+            any(table in query['sql'] for query in replica.captured_queries),
+        )
+
+    def test_list_and_export_read_from_the_replica(self):
+        self.assertEqual(self.request_tables(lambda: self.client.get('/api/requests/')), (False, True))
+        self.assertEqual(self.request_tables(lambda: self.client.get('/api/requests/export/')), (False, True))
+
+    def test_other_actions_stay_on_the_primary(self):
+        self.assertEqual(
+            self.request_tables(lambda: self.client.get('/api/requests/summary/'), PurchaseRequestSummary), (True, False),
+        )
+        self.assertEqual(
+            self.request_tables(lambda: self.client.patch(f'/api/requests/{self.pr.id}/approve/')), (True, False),
+        )
+        self.pr.refresh_from_db()
+        self.assertEqual(self.pr.status, PurchaseRequest.APPROVED)
+
+    def test_writer_is_pinned_to_the_primary(self):
+        response = self.client.patch(f'/api/requests/{self.pr.id}/reject/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.request_tables(lambda: self.client.get('/api/requests/')), (True, False))
+
+        # Once the window has passed the user is back on the replica
+        cache.delete(db_router.sticky_key(self.manager.id))
+        self.assertEqual(self.request_tables(lambda: self.client.get('/api/requests/')), (False, True))
+
+    def test_router(self):
+        router = db_router.ReadReplicaRouter()
+        self.assertEqual(router.db_for_write(PurchaseRequest), DEFAULT_DB_ALIAS)
+        with db_router.read_scope():
+            db_router.route_reads(db_router.REPLICA)
+            self.assertEqual(router.db_for_read(PurchaseRequest), db_router.REPLICA)
+            self.assertEqual(router.db_for_write(PurchaseRequest), DEFAULT_DB_ALIAS)
+        # Outside a request's scope reads use Django's default choice
+        self.assertIsNone(router.db_for_read(PurchaseRequest))
@@ -0,0 +1,77 @@
+"""
+Atomic, conditional status transitions for PurchaseRequest.
+
+A transition is a single `UPDATE ... WHERE id IN (...) AND status = <from>
+RETURNING ...` statement: it only touches the status/approver/timestamp
+columns, needs no prior read, and is safe under concurrent managers since
+the WHERE clause re-checks the status after any row lock is released.
+"""
+import uuid
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core import events, summary
+from core.models import PurchaseRequest
+
+TransitionedRequest = namedtuple('TransitionedRequest', ['id', 'amount', 'created_at', 'created_by_id'])
+
+ALLOWED_TRANSITIONS = {
+    (PurchaseRequest.PENDING, PurchaseRequest.APPROVED),
+    (PurchaseRequest.PENDING, PurchaseRequest.REJECTED),
+}
+
+
+def _column(name):
+    return connection.ops.quote_name(PurchaseRequest._meta.get_field(name).column)
+
+
+def transition(request_ids, from_status, to_status, approved_by=None) -> list:
+    """
+    Move every request in `request_ids` that is currently `from_status` to
+    `to_status`, recording `approved_by` as the deciding manager.
+    Returns a TransitionedRequest for each row that actually changed.
+    """
+    if (from_status, to_status) not in ALLOWED_TRANSITIONS:
+        raise ValueError(f"Transition {from_status} -> {to_status} is not allowed")
+    request_ids = list(request_ids)
+    if not request_ids:
+        return []
+
+    sql = (
+        f"UPDATE {connection.ops.quote_name(PurchaseRequest._meta.db_table)} "
+        f"SET {_column('status')} = %s, {_column('approved_by')} = %s, {_column('timestamps')} = %s "
+        f"WHERE {_column('id')} IN ({', '.join(['%s'] * len(request_ids))}) AND {_column('status')} = %s "
+        f"RETURNING {_column('id')}, {_column('amount')}, {_column('created_at')}, {_column('created_by')}"
+    )
+    params = [
+        to_status,
+        approved_by.pk if approved_by else None,
+        timezone.now(),
+        *[str(pk) for pk in request_ids],
+        from_status,
+    ]
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = [
+                TransitionedRequest(
+                    id=uuid.UUID(str(pk)),
+                    amount=amount,
+                    created_at=created_at,
+                    created_by_id=uuid.UUID(str(created_by_id)) if created_by_id else None,
+                )
+                for pk, amount, created_at, created_by_id in cursor.fetchall()
+            ]
+        summary.record_bulk_transition(rows, from_status, to_status)
+        for row in rows:
+            events.publish(row.id, row.created_by_id, to_status)
+    return rows
+
+
+def transition_one(request_id, from_status, to_status, approved_by=None):
+    """Single-request variant of `transition`. Returns None if the row did not match."""
+    rows = transition([request_id], from_status, to_status, approved_by)
+    return rows[0] if rows else None
@@ -6,6 +6,7 @@ from rest_framework import routers
 
 # Local imports
 from core.views import (PurchaseRequestViewSet)
+from core import async_views
 
 router = routers.DefaultRouter()
 
@@ -13,4 +14,8 @@ router = routers.DefaultRouter()
 
 router.register('requests', PurchaseRequestViewSet, basename='purchase-request')
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = router.urls + [
+    # Async (ASGI) variants of the AI-bound actions
+    path('async/requests/<uuid:id>/approve/', async_views.approve_purchase_request, name='purchase-request-approve-async'),
+    path('async/requests/<uuid:id>/submit-receipt/', async_views.submit_receipt, name='purchase-request-submit-receipt-async'),
+]
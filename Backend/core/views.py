@@ -1,4 +1,10 @@
 
+# Python imports
+import csv
+import json
+import os
+from datetime import datetime, time, timedelta
+
 # Third party imports
 from rest_framework import viewsets, status
 from rest_framework.response import Response
@@ -7,17 +13,69 @@ from rest_framework.decorators import action
 
 # Django imports
 from django.contrib.auth import update_session_auth_hash, logout
-from core.serializers import PurchaseRequestSerializer, SubmitReceiptSerializer
-from core.models import PurchaseRequest
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.db import connection, transaction
+from django.db.models import F
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from core.serializers import (
+    PurchaseRequestSerializer,
+    SubmitReceiptSerializer,
+    PurchaseRequestFilterSerializer,
+    PurchaseRequestExportSerializer,
+    PurchaseRequestSummarySerializer,
+    BulkTransitionSerializer,
+    BulkTransitionResponseSerializer,
+)
+from core import db_router, events, metrics, tasks, transitions, warmup
+from core.models import PurchaseOrder, PurchaseRequest, PurchaseRequestSummary
+from core import summary
+from core.middleware import endpoint_stats
 from core.permissions import HasStaffMemberPermission, HasManagmentPermission, HasFinanceMemberPermission
 from accounts.models import User, Manager, StaffMember
+from accounts.profiles import get_role_profile
+from accounts.authentication import StatelessJWTAuthentication, QueryParamJWTAuthentication
 
 
 from drf_spectacular.utils import extend_schema, extend_schema_view
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+
+# Export column name -> queryset lookup
+EXPORT_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'description': 'description',
+    'amount': 'amount',
+    'status': 'status',
+    'requester': 'created_by__user__username',
+    'approver': 'approved_by__user__username',
+    'created_at': 'created_at',
+    'updated_at': 'timestamps',
+    'receipt_validation_status': 'receipt_validation_status',
+}
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([value.isoformat() if hasattr(value, 'isoformat') else value for value in row])
+
 
 @extend_schema_view(
-    list=extend_schema(summary="List purchase requests"),
+    list=extend_schema(
+        summary="List purchase requests",
+        parameters=[PurchaseRequestFilterSerializer],
+    ),
     create=extend_schema(
         summary="Create a purchase request",
         description="Create a new purchase request. Only staff members can create purchase requests.",
@@ -26,7 +84,8 @@ from rest_framework.parsers import MultiPartParser, FormParser
     )
 )
 class PurchaseRequestViewSet(viewsets.GenericViewSet):
-    queryset = PurchaseRequest.objects.all()
+    # proforma_text / proforma_tables are only read by PO generation; keep them out of list pages
+    queryset = PurchaseRequest.objects.select_related('created_by__user', 'approved_by__user').defer('proforma_text', 'proforma_tables')
     serializer_class = PurchaseRequestSerializer
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
@@ -34,12 +93,75 @@ class PurchaseRequestViewSet(viewsets.GenericViewSet):
     # UUID lookup
     lookup_field = "id"
     lookup_url_kwarg = "id"
+    lookup_value_regex = "[0-9a-fA-F-]{36}"
 
-    def list(self, request, *args, **kwargs):
+    # Actions whose reads may be served by the read replica (core.db_router)
+    replica_actions = {'list', 'export'}
+
+    def dispatch(self, request, *args, **kwargs):
+        # Time every action under view.<action>; streaming actions are timed
+        # until the response is handed back, not for the whole stream
+        action_name = self.action_map.get(request.method.lower(), request.method.lower())
+        with metrics.span(f"view.{action_name}"), db_router.read_scope():
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Decided after authentication so the user's read-your-writes window applies
+        if self.action in self.replica_actions:
+            db_router.route_reads(db_router.read_alias_for(request.user.id))
+
+    def filter_queryset(self, queryset):
+        """
+        Apply the optional list filters. Every filter is a plain range or
+        equality on an indexed column so the planner can use the
+        (created_by, -created_at) / (status, -created_at) indexes.
+        """
+        if self.action not in ('list', 'export'):
+            return queryset
+
+        filters = PurchaseRequestFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        params = filters.validated_data
+
+        if 'status' in params:
+            queryset = queryset.filter(status=params['status'])
+        if 'min_amount' in params:
+            queryset = queryset.filter(amount__gte=params['min_amount'])
+        if 'max_amount' in params:
+            queryset = queryset.filter(amount__lte=params['max_amount'])
+        # Compare against day boundaries instead of created_at__date so the
+        # created_at column stays sargable.
+        if 'created_after' in params:
+            start = timezone.make_aware(datetime.combine(params['created_after'], time.min))
+            queryset = queryset.filter(created_at__gte=start)
+        if 'created_before' in params:
+            end = timezone.make_aware(datetime.combine(params['created_before'] + timedelta(days=1), time.min))
+            queryset = queryset.filter(created_at__lt=end)
+        # Full-text search goes through the GIN index on search_vector;
+        # ranked hits replace the default newest-first ordering.
+        if params.get('q', '').strip():
+            query = SearchQuery(params['q'], config='english', search_type='websearch')
+            queryset = queryset.filter(search_vector=query).annotate(
+                rank=SearchRank(F('search_vector'), query)
+            ).order_by('-rank', '-created_at')
+        return queryset
+
+    def scoped_queryset(self):
+        """Requests visible to the caller: staff only see their own."""
         qs = self.get_queryset()
+        if self.request.user.user_type == User.STAFF:
+            staff_profile = get_role_profile(self.request, StaffMember)
+            qs = qs.filter(created_by=staff_profile) if staff_profile else qs.none()
+        return qs
+
+    def list(self, request, *args, **kwargs):
+        qs = self.filter_queryset(self.scoped_queryset())
 
-        if request.user.user_type == User.STAFF:
-            qs = qs.filter(created_by__user=request.user)
+        page = self.paginate_queryset(qs)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
 
         serializer = self.get_serializer(qs, many=True)
         return Response(serializer.data)
@@ -55,7 +177,12 @@ class PurchaseRequestViewSet(viewsets.GenericViewSet):
             
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        with transaction.atomic():
+            pr = serializer.save()
+            summary.record_created(pr)
+            if pr.proforma:
+                # Off the approval path: extract while the request waits for a manager
+                tasks.enqueue(tasks.extract_proforma, pr.id)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
@@ -67,28 +194,62 @@ class PurchaseRequestViewSet(viewsets.GenericViewSet):
                 "status_code": status.HTTP_403_FORBIDDEN
                 }, status=status.HTTP_403_FORBIDDEN)
         
-        if instance.created_by.user != request.user:
+        staff_profile = get_role_profile(request, StaffMember)
+        if staff_profile is None or instance.created_by_id != staff_profile.pk:
             return Response({
                 "errorMessage": "You can only update your own purchase requests",
                 "status_code": status.HTTP_403_FORBIDDEN
                 }, status=status.HTTP_403_FORBIDDEN)
             
-        if request.user.user_type == User.STAFF and instance.status != PurchaseRequest.PENDING:
-            return Response({
-                "errorMessage": "Cannot update after approval or rejection",
-                "status_code": status.HTTP_400_BAD_REQUEST
-                }, status=status.HTTP_400_BAD_REQUEST)
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        with transaction.atomic():
+            # Lock the row so a concurrent approve/reject can't interleave with the edit
+            current = PurchaseRequest.objects.select_for_update().only('status', 'amount').get(pk=instance.pk)
+            if current.status != PurchaseRequest.PENDING:
+                return Response({
+                    "errorMessage": "Cannot update after approval or rejection",
+                    "status_code": status.HTTP_400_BAD_REQUEST
+                    }, status=status.HTTP_400_BAD_REQUEST)
+            proforma_changed = 'proforma' in serializer.validated_data
+            # A new proforma invalidates the extracted text and tables; any edit
+            # can change the title/amount the PO data was extracted with
+            pr = serializer.save(**({'proforma_text': None, 'proforma_tables': None} if proforma_changed else {}))
+            summary.record_amount_change(pr, current.amount)
+            PurchaseOrder.objects.filter(purchase_request=pr).delete()
+            if pr.proforma and (proforma_changed or settings.PROFORMA_AI_PREEXTRACT):
+                tasks.enqueue(tasks.extract_proforma, pr.id)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def _transition_failed(self, id):
+        """Explain why a single-request transition matched no row."""
+        current = PurchaseRequest.objects.filter(id=id).values_list('status', flat=True).first()
+        if current is None:
+            return Response({
+                "errorMessage": "Purchase request not found",
+                "status_code": status.HTTP_404_NOT_FOUND
+                }, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            "errorMessage": f"Purchase request is already {current}",
+            "status_code": status.HTTP_409_CONFLICT
+            }, status=status.HTTP_409_CONFLICT)
+
+    def _no_manager_profile(self):
+        return Response({
+            "errorMessage": "Your account has no manager profile",
+            "status_code": status.HTTP_403_FORBIDDEN
+            }, status=status.HTTP_403_FORBIDDEN)
+
     @action(detail=True, methods=["patch"], url_path="approve", permission_classes=[HasManagmentPermission])
     def approve(self, request, id=None):
+        # Lookup and object permissions first: nothing may be written on a 403/404
         pr: PurchaseRequest = self.get_object()
-        pr.status = PurchaseRequest.APPROVED
-        pr.approved_by = Manager.objects.get(user__username=request.user)
-        pr.save()
+        manager = get_role_profile(request, Manager)
+        if manager is None:
+            return self._no_manager_profile()
+        if not transitions.transition_one(pr.id, PurchaseRequest.PENDING, PurchaseRequest.APPROVED, manager):
+            return self._transition_failed(id)
+        pr.refresh_from_db()
 
         # Automatically generate Purchase Order
         po_result = {"success": False, "message": "No proforma attached"}
@@ -117,14 +278,226 @@ class PurchaseRequestViewSet(viewsets.GenericViewSet):
     @action(detail=True, methods=["patch"], url_path="reject", permission_classes=[HasManagmentPermission])
     def reject(self, request, id=None):
         pr = self.get_object()
-        pr.status = PurchaseRequest.REJECTED
-        pr.approved_by = Manager.objects.get(user=request.user)
-        pr.save()
+        manager = get_role_profile(request, Manager)
+        if manager is None:
+            return self._no_manager_profile()
+        if not transitions.transition_one(pr.id, PurchaseRequest.PENDING, PurchaseRequest.REJECTED, manager):
+            return self._transition_failed(id)
         return Response({
             "successMessage": "Purchase request rejected",
             "status_code": status.HTTP_200_OK
             }, status=status.HTTP_200_OK)
 
+    def _bulk_transition(self, request, to_status):
+        """
+        Move every still-pending request in `ids` to `to_status` with one
+        conditional UPDATE. Returns per-id outcomes and the ids that
+        actually transitioned.
+        """
+        serializer = BulkTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        manager = get_role_profile(request, Manager)
+
+        rows = transitions.transition(ids, PurchaseRequest.PENDING, to_status, manager)
+        transitioned = [row.id for row in rows]
+
+        remaining = set(ids) - set(transitioned)
+        current = dict(PurchaseRequest.objects.filter(id__in=remaining).values_list('id', 'status'))
+        results = []
+        for pr_id in ids:
+            if pr_id in current:
+                results.append({"id": pr_id, "outcome": "not_pending", "status": current[pr_id]})
+            elif pr_id in remaining:
+                results.append({"id": pr_id, "outcome": "not_found", "status": None})
+            else:
+                results.append({"id": pr_id, "outcome": to_status, "status": to_status})
+        return results, transitioned
+
+    @extend_schema(
+        summary="Approve several purchase requests",
+        request=BulkTransitionSerializer,
+        responses=BulkTransitionResponseSerializer,
+    )
+    @action(detail=False, methods=["post"], url_path="bulk-approve", permission_classes=[HasManagmentPermission],
+            parser_classes=[JSONParser, MultiPartParser, FormParser])
+    def bulk_approve(self, request):
+        if get_role_profile(request, Manager) is None:
+            return self._no_manager_profile()
+        results, approved = self._bulk_transition(request, PurchaseRequest.APPROVED)
+
+        # PO generation is slow (OCR + AI + PDF); run it for the whole batch after commit
+        if approved:
+            tasks.enqueue(tasks.generate_purchase_orders, approved)
+
+        serializer = BulkTransitionResponseSerializer({
+            "successMessage": f"{len(approved)} of {len(results)} purchase requests approved",
+            "status_code": status.HTTP_200_OK,
+            "results": results,
+            "po_generation_queued": len(approved),
+        })
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        summary="Reject several purchase requests",
+        request=BulkTransitionSerializer,
+        responses=BulkTransitionResponseSerializer,
+    )
+    @action(detail=False, methods=["post"], url_path="bulk-reject", permission_classes=[HasManagmentPermission],
+            parser_classes=[JSONParser, MultiPartParser, FormParser])
+    def bulk_reject(self, request):
+        if get_role_profile(request, Manager) is None:
+            return self._no_manager_profile()
+        results, rejected = self._bulk_transition(request, PurchaseRequest.REJECTED)
+        serializer = BulkTransitionResponseSerializer({
+            "successMessage": f"{len(rejected)} of {len(results)} purchase requests rejected",
+            "status_code": status.HTTP_200_OK,
+            "results": results,
+            "po_generation_queued": 0,
+        })
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        summary="Export purchase requests",
+        description="Stream every visible purchase request matching the list filters as CSV or NDJSON.",
+        parameters=[PurchaseRequestExportSerializer],
+        responses={(200, 'text/csv'): str, (200, 'application/x-ndjson'): str},
+    )
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """
+        Rows are read with a server-side cursor in EXPORT_CHUNK_SIZE chunks and
+        written to the response as they arrive, so memory use and time to
+        first byte don't depend on how many rows are exported.
+        """
+        options = PurchaseRequestExportSerializer(data=request.query_params)
+        options.is_valid(raise_exception=True)
+        export_format = options.validated_data['export_format']
+
+        queryset = self.filter_queryset(self.scoped_queryset())
+        rows = (
+            # Rows are fetched after the view returns, outside the request's
+            # read routing, so bind the alias now
+            queryset.using(queryset.db)
+            .values_list(*EXPORT_FIELDS.values())
+            .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+        )
+        header = list(EXPORT_FIELDS)
+
+        if export_format == 'ndjson':
+            content = (json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + "\n" for row in rows)
+            content_type = 'application/x-ndjson'
+        else:
+            content = _csv_lines(header, rows)
+            content_type = 'text/csv'
+
+        filename = f"purchase_requests_{timezone.now():%Y%m%d_%H%M%S}.{export_format}"
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def _event_stream(self, subscriber, matches, snapshot=None):
+        response = StreamingHttpResponse(
+            events.stream(
+                subscriber,
+                matches,
+                snapshot=snapshot,
+                heartbeat=settings.SSE_HEARTBEAT_INTERVAL,
+                max_duration=settings.SSE_MAX_DURATION,
+            ),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        # Closing a generator that never started skips its finally block
+        response._resource_closers.append(lambda: events.hub.unsubscribe(subscriber))
+        return response
+
+    @extend_schema(
+        summary="Stream progress events for one purchase request",
+        operation_id="requests_events_retrieve",
+        description="Server-Sent Events. Sends a `snapshot` first, then extracted, validating, valid/invalid/error, po_ready, approved and rejected events. Accepts the access token as `?token=` for EventSource clients.",
+        responses={(200, 'text/event-stream'): str},
+    )
+    @action(detail=True, methods=["get"], url_path="events",
+            url_name="events", authentication_classes=[StatelessJWTAuthentication, QueryParamJWTAuthentication])
+    def request_events(self, request, id=None):
+        pr = self.get_object()
+        staff_profile = get_role_profile(request, StaffMember)
+        if request.user.user_type == User.STAFF and (staff_profile is None or pr.created_by_id != staff_profile.pk):
+            return Response({
+                "errorMessage": "You can only follow your own purchase requests",
+                "status_code": status.HTTP_403_FORBIDDEN
+                }, status=status.HTTP_403_FORBIDDEN)
+
+        # Subscribe before reading the snapshot so a change committed after
+        # get_object() still reaches the client
+        subscriber = events.hub.subscribe()
+        try:
+            pr.refresh_from_db(fields=['status', 'receipt_validation_status', 'purchase_order'])
+        except Exception:
+            events.hub.unsubscribe(subscriber)
+            raise
+        snapshot = {
+            "request_id": str(pr.id),
+            "status": pr.status,
+            "receipt_validation_status": pr.receipt_validation_status,
+            "purchase_order": pr.purchase_order.name or None,
+        }
+        request_id = str(pr.id)
+        return self._event_stream(subscriber, lambda event: event["request_id"] == request_id, snapshot)
+
+    @extend_schema(
+        summary="Stream progress events for all visible purchase requests",
+        operation_id="requests_events_list",
+        description="Server-Sent Events for every request the caller can see (staff: their own). Accepts the access token as `?token=`.",
+        responses={(200, 'text/event-stream'): str},
+    )
+    @action(detail=False, methods=["get"], url_path="events", url_name="events-all",
+            authentication_classes=[StatelessJWTAuthentication, QueryParamJWTAuthentication])
+    def all_events(self, request):
+        if request.user.user_type != User.STAFF:
+            return self._event_stream(events.hub.subscribe(), lambda event: True)
+
+        staff_profile = get_role_profile(request, StaffMember)
+        requester_id = str(staff_profile.pk) if staff_profile else None
+        return self._event_stream(events.hub.subscribe(), lambda event: requester_id is not None and event["requester_id"] == requester_id)
+
+    @extend_schema(summary="Spend and status dashboard", responses=PurchaseRequestSummarySerializer)
+    @action(detail=False, methods=["get"], url_path="summary", permission_classes=[HasManagmentPermission])
+    def spend_summary(self, request):
+        """
+        Totals by status, month and requester, read from the incrementally
+        maintained summary table. Cost is proportional to the number of
+        buckets, not the number of purchase requests.
+        """
+        buckets = PurchaseRequestSummary.objects.filter(request_count__gt=0).select_related('requester__user')
+
+        totals = {"request_count": 0, "total_amount": 0}
+        by_status, by_month, by_requester = {}, {}, {}
+        for bucket in buckets:
+            month = bucket.month.strftime('%Y-%m')
+            requester = bucket.requester.user.username if bucket.requester else None
+            for group, key, extra in (
+                (by_status, bucket.status, {"status": bucket.status}),
+                (by_month, (month, bucket.status), {"month": month, "status": bucket.status}),
+                (by_requester, (requester, bucket.status), {"requester": requester, "status": bucket.status}),
+            ):
+                row = group.setdefault(key, {**extra, "request_count": 0, "total_amount": 0})
+                row["request_count"] += bucket.request_count
+                row["total_amount"] += bucket.total_amount
+            totals["request_count"] += bucket.request_count
+            totals["total_amount"] += bucket.total_amount
+
+        serializer = PurchaseRequestSummarySerializer({
+            "totals": totals,
+            "by_status": list(by_status.values()),
+            "by_month": sorted(by_month.values(), key=lambda row: row["month"], reverse=True),
+            "by_requester": list(by_requester.values()),
+        })
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
     @extend_schema(
         request=SubmitReceiptSerializer,
         responses=PurchaseRequestSerializer,
@@ -139,7 +512,8 @@ class PurchaseRequestViewSet(viewsets.GenericViewSet):
 
         receipt_serializer = SubmitReceiptSerializer(instance=pr, data=request.data, partial=True)
         receipt_serializer.is_valid(raise_exception=True)
-        receipt_serializer.save()
+        with metrics.span('db.save_receipt'):
+            receipt_serializer.save()
 
         # Validate receipt with AI
         try:
@@ -152,13 +526,18 @@ class PurchaseRequestViewSet(viewsets.GenericViewSet):
             )
 
             # Update validation status based on result
-            if validation_result.get('is_valid'):
+            if validation_result.get('extraction_failure'):
+                # Unreadable (timeout, limits, bad file) rather than invalid
+                pr.receipt_validation_status = 'error'
+            elif validation_result.get('is_valid'):
                 pr.receipt_validation_status = 'valid'
             else:
                 pr.receipt_validation_status = 'invalid'
 
             pr.receipt_validation_result = validation_result
-            pr.save()
+            with metrics.span('db.save_validation'):
+                pr.save()
+            events.publish_for(pr, pr.receipt_validation_status)
 
             return Response({
                 "successMessage": "Receipt submitted and validated successfully",
@@ -176,6 +555,7 @@ class PurchaseRequestViewSet(viewsets.GenericViewSet):
                 "summary": "Validation failed due to system error"
             }
             pr.save()
+            events.publish_for(pr, 'error', error=str(e))
 
             return Response({
                 "successMessage": "Receipt submitted but validation failed",
@@ -185,3 +565,35 @@ class PurchaseRequestViewSet(viewsets.GenericViewSet):
             }, status=status.HTTP_200_OK)
 
 
+def request_stats(request):
+    """
+    Rolling per-endpoint latency and query counts recorded by
+    RequestTimingMiddleware. Served under the admin site (staff only); the
+    numbers are for the worker process that answers.
+    """
+    return JsonResponse({"pid": os.getpid(), "endpoints": endpoint_stats.snapshot()})
+
+
+def healthz(request):
+    """
+    Liveness: the process is up and serving. Deliberately independent of
+    warm-up, which under runserver / uvicorn only /readyz triggers; gating
+    liveness on it would get the process restarted forever.
+    """
+    return JsonResponse({"status": "ok", "warm": warmup.is_warm()})
+
+
+def readyz(request):
+    """
+    Readiness: warmed up and the database is reachable. Processes that were
+    not warmed by gunicorn.conf.py (runserver, uvicorn) warm up on the first
+    probe.
+    """
+    if not warmup.is_warm():
+        warmup.warm_up()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except Exception as e:
+        return JsonResponse({"status": "database unavailable", "error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return JsonResponse({"status": "ready"})
@@ -0,0 +1,118 @@
+"""
+Process warm-up run before the first request is served.
+
+gunicorn.conf.py preloads the app and calls warm_up() in the master, so
+every forked worker starts with URL resolvers built, serializers and the
+OpenAPI schema introspected, reportlab fonts/styles and the OCR / LLM
+client libraries already imported (shared copy-on-write). Under servers
+without that hook the readiness endpoint runs it on first probe instead.
+"""
+import io
+import logging
+import os
+import threading
+import time
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_warm = False
+
+
+def is_warm():
+    return _warm
+
+
+def _urls():
+    from django.urls import get_resolver, resolve
+
+    get_resolver()._populate()
+    for path in ('/api/requests/', '/api/accounts/login/', '/dashboard/'):
+        resolve(path)
+
+
+def _serializers():
+    from rest_framework.serializers import BaseSerializer
+
+    from core import serializers
+
+    for value in vars(serializers).values():
+        if isinstance(value, type) and issubclass(value, BaseSerializer) and value.__module__ == serializers.__name__:
+            try:
+                value().fields
+            except Exception:
+                # Serializers that need context/arguments just aren't warmed
+                logger.debug("Could not warm %s", value.__name__, exc_info=True)
+
+
+def _schema():
+    from drf_spectacular.generators import SchemaGenerator
+
+    SchemaGenerator().get_schema(request=None, public=True)
+
+
+def _pdf():
+    # Same reportlab pieces as POGenerationService.generate_po_pdf, without
+    # going through the service (and its metrics) in the master process
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+    styles = getSampleStyleSheet()
+    table = Table([["Item", "Total"], ["Warm-up", "0.00"]])
+    table.setStyle(TableStyle([('GRID', (0, 0), (-1, -1), 0.5, colors.grey)]))
+    SimpleDocTemplate(io.BytesIO(), pagesize=letter).build(
+        [Paragraph("<b>PURCHASE ORDER</b>", styles['Title']), Spacer(1, 12), table]
+    )
+
+
+def _extraction():
+    import numpy  # noqa: F401
+    import pdfplumber  # noqa: F401
+    import pytesseract  # noqa: F401
+    from PIL import Image  # noqa: F401
+
+
+def _llm_client():
+    from openai import OpenAI
+
+    if os.environ.get('OPENAI_API_KEY'):
+        from core.services import _openai_client_kwargs
+
+        OpenAI(**_openai_client_kwargs()).close()
+
+
+STEPS = [
+    ('urls', _urls),
+    ('serializers', _serializers),
+    ('schema', _schema),
+    ('pdf', _pdf),
+    ('extraction', _extraction),
+    ('llm_client', _llm_client),
+]
+
+
+def warm_up():
+    """Run every warm-up step once per process. Returns {step: seconds}."""
+    global _warm
+    with _lock:
+        if _warm:
+            return {}
+        timings = {}
+        try:
+            for name, step in STEPS:
+                started = time.perf_counter()
+                try:
+                    step()
+                except Exception:
+                    # A failed step only costs the first request; still serve
+                    logger.exception("Warm-up step %s failed", name)
+                timings[name] = time.perf_counter() - started
+        finally:
+            # Never hand a connection opened here to forked workers
+            connections.close_all()
+        _warm = True
+        return timings
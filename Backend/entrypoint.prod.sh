@@ -11,4 +11,13 @@ then
     echo "PostgreSQL started"
 fi
 
+# prometheus_client fails on the first metric update if its multiprocess
+# directory is missing; start every server (gunicorn or uvicorn) with an
+# empty one so series from a previous run don't linger
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]
+then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 exec "$@"
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Production gunicorn configuration, picked up automatically from the working
+directory (or pass -c gunicorn.conf.py).
+
+The app is preloaded in the master and warmed there (core.warmup) before
+workers are forked, so workers start with imports, URL resolvers, schema
+and PDF fonts already in shared memory instead of paying for them on their
+first requests. The worker model comes from the SERVER_WORKER_CLASS
+setting: gthread (default) keeps SSE streams from tying up a whole
+process; sync suits CPU-bound deployments without SSE.
+
+With PROMETHEUS_MULTIPROC_DIR set, each worker writes its metrics to mmap
+files in that directory; clear stale files from a previous run on start and
+drop a worker's live series once it exits.
+"""
+import multiprocessing
+import os
+import shutil
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Backend.settings')
+
+from django.conf import settings  # noqa: E402
+
+if settings.SERVER_WORKER_CLASS not in ('gthread', 'sync'):
+    raise RuntimeError(f"SERVER_WORKER_CLASS must be gthread or sync, not {settings.SERVER_WORKER_CLASS!r}")
+
+wsgi_app = 'Backend.wsgi:application'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:9000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = settings.SERVER_WORKER_CLASS
+threads = settings.SERVER_THREADS if worker_class == 'gthread' else 1
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = True
+
+
+def on_starting(server):
+    if workers > 1 and settings.CACHES['default']['BACKEND'].endswith('LocMemCache'):
+        server.log.warning(
+            "%d workers share no cache (CACHE_URL is unset): a disabled user or changed "
+            "role stays cached in the other workers for up to %ss",
+            workers, max(settings.TOKEN_USER_STATUS_CACHE_TIMEOUT, settings.ROLE_PROFILE_CACHE_TIMEOUT),
+        )
+    multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def when_ready(server):
+    # Runs in the master after the app is preloaded and before any worker
+    # is forked; without preload each worker warms itself instead
+    if server.cfg.preload_app:
+        _warm_up(server.log)
+
+
+def post_worker_init(worker):
+    if not worker.cfg.preload_app:
+        _warm_up(worker.log)
+
+
+def _warm_up(log):
+    from core.warmup import warm_up
+
+    timings = warm_up()
+    log.info("Warm-up done in %.2fs (%s)", sum(timings.values()),
+             ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
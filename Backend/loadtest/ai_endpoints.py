@@ -0,0 +1,88 @@
+"""
+Compare the sync (gunicorn/WSGI) and async (uvicorn/ASGI) approve paths.
+
+Creates pending purchase requests with a proforma, then approves them with
+N concurrent clients against each server and reports throughput, latency
+percentiles and errors. Run both servers against the same database and the
+stub LLM (loadtest/stub_llm.py) so results reflect worker behaviour rather
+than OpenAI:
+
+    python loadtest/stub_llm.py --latency 1.5 &
+    gunicorn Backend.wsgi:application --bind :9000 --workers 2 &
+    uvicorn Backend.asgi:application --port 9001 --workers 2 &
+    python loadtest/ai_endpoints.py --staff alice:pw --manager bob:pw \
+        --requests 200 --concurrency 100
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from common import login, proforma_pdf, report
+
+
+async def create_requests(client, base_url, headers, count, concurrency):
+    pdf = proforma_pdf()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def create(i):
+        async with semaphore:
+            response = await client.post(
+                f"{base_url}/api/requests/",
+                headers=headers,
+                data={"title": f"Load test {i}", "description": "Widgets", "amount": "100.00"},
+                files={"proforma": (f"proforma_{i}.pdf", pdf, "application/pdf")},
+            )
+            response.raise_for_status()
+            return response.json()["id"]
+
+    return await asyncio.gather(*(create(i) for i in range(count)))
+
+
+async def approve_all(client, base_url, path, headers, ids, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def approve(pr_id):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.patch(f"{base_url}{path.format(id=pr_id)}", headers=headers)
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - started)
+                    return
+            except httpx.HTTPError:
+                pass
+            errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(approve(pr_id) for pr_id in ids))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        for name, base_url, path in (
+            ("sync (WSGI)", args.sync_url, "/api/requests/{id}/approve/"),
+            ("async (ASGI)", args.async_url, "/api/async/requests/{id}/approve/"),
+        ):
+            staff = await login(client, base_url, args.staff)
+            manager = await login(client, base_url, args.manager)
+            ids = await create_requests(client, base_url, staff, args.requests, min(args.concurrency, 20))
+            latencies, errors, elapsed = await approve_all(client, base_url, path, manager, ids, args.concurrency)
+            report(name, latencies, errors, elapsed)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sync-url', default='http://localhost:9000')
+    parser.add_argument('--async-url', default='http://localhost:9001')
+    parser.add_argument('--staff', required=True, help='username:password of a staff user')
+    parser.add_argument('--manager', required=True, help='username:password of a manager')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--timeout', type=float, default=120)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,48 @@
+"""Shared helpers for the load-test scripts."""
+import io
+import math
+
+import httpx
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def report(name, latencies, errors, elapsed):
+    """Print throughput, latency percentiles (ms) and error rate for one run."""
+    values = sorted(latencies)
+    total = len(values) + errors
+    print(
+        f"{name:<24} n={total:<6} rps={total / elapsed if elapsed else 0:8.1f} "
+        f"p50={percentile(values, 50) * 1000:8.1f} p95={percentile(values, 95) * 1000:8.1f} "
+        f"p99={percentile(values, 99) * 1000:8.1f} max={(values[-1] if values else 0) * 1000:8.1f} "
+        f"errors={errors} ({errors / total * 100 if total else 0:.1f}%)"
+    )
+
+
+async def login(client: httpx.AsyncClient, base_url, credentials):
+    """credentials is "username:password"; returns the Authorization header dict."""
+    username, password = credentials.split(':', 1)
+    response = await client.post(f"{base_url}/api/accounts/login/", json={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"JWT {response.json()['access']}"}
+
+
+def proforma_pdf() -> bytes:
+    """A small text PDF that exercises the real extraction path."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    for line, text in enumerate([
+        "PROFORMA INVOICE", "Stub Supplies Ltd, 1 Test Road",
+        "Widget  x2  50.00  100.00", "Subtotal 100.00", "Total 100.00", "Payment: Net 30",
+    ]):
+        pdf.drawString(72, 720 - line * 18, text)
+    pdf.save()
+    return buffer.getvalue()
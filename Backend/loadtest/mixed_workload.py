@@ -0,0 +1,168 @@
+"""
+Replay a mixed API workload at a fixed arrival rate.
+
+Operations are started open-loop at --rps (a slow server does not slow the
+arrivals down, so queueing shows up in the latencies) and picked by weight:
+login, list, create, approve and submit-receipt. Approve takes requests
+created earlier in the run, submit-receipt takes approved ones; when none
+are available yet the slot falls back to a list. Use users created by
+`manage.py seed` and run the backend against the stub LLM:
+
+    python manage.py seed --requests 1000000
+    python loadtest/stub_llm.py --latency 1.5 &
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://localhost:8099/v1 \
+        gunicorn Backend.wsgi:application --bind :9000 &
+    python loadtest/mixed_workload.py --rps 50 --duration 60
+
+Latency percentiles and error rates are reported per operation.
+"""
+import argparse
+import asyncio
+import collections
+import random
+import time
+
+import httpx
+
+from common import login, proforma_pdf, report
+
+# Default share of each operation in the mix
+DEFAULT_MIX = "login=5,list=50,create=20,approve=15,submit_receipt=10"
+
+
+class Workload:
+    def __init__(self, client, args):
+        self.client = client
+        self.args = args
+        self.rng = random.Random(args.random_seed)
+        self.pdf = proforma_pdf()
+        self.staff = []
+        self.managers = []
+        self.pending = collections.deque()
+        self.approved = collections.deque()
+        self.latencies = collections.defaultdict(list)
+        self.errors = collections.Counter()
+        self.dropped = 0
+
+    def url(self, path):
+        return f"{self.args.url}{path}"
+
+    async def setup(self):
+        """Log in a pool of seeded staff users and managers to spread the load"""
+        for i in range(self.args.staff_logins):
+            self.staff.append(await login(self.client, self.args.url, f"{self.args.prefix}_staff_{i}:{self.args.password}"))
+        for i in range(self.args.manager_logins):
+            self.managers.append(await login(self.client, self.args.url, f"{self.args.prefix}_management_{i}:{self.args.password}"))
+
+    async def op_login(self):
+        username = f"{self.args.prefix}_staff_{self.rng.randrange(self.args.staff_logins)}"
+        return await self.client.post(self.url("/api/accounts/login/"), json={"username": username, "password": self.args.password})
+
+    async def op_list(self):
+        return await self.client.get(self.url("/api/requests/?page=1"), headers=self.rng.choice(self.staff + self.managers))
+
+    async def op_create(self):
+        headers = self.rng.choice(self.staff)
+        response = await self.client.post(
+            self.url("/api/requests/"),
+            headers=headers,
+            data={"title": "Load test widgets", "description": "Mixed workload", "amount": "100.00"},
+            files={"proforma": ("proforma.pdf", self.pdf, "application/pdf")},
+        )
+        if response.status_code == 201:
+            # Keep the creator's token: staff can only see their own requests
+            self.pending.append((response.json()["id"], headers))
+        return response
+
+    async def op_approve(self):
+        pr_id, creator = self.pending.popleft()
+        response = await self.client.patch(self.url(f"/api/requests/{pr_id}/approve/"), headers=self.rng.choice(self.managers))
+        if response.status_code == 200:
+            self.approved.append((pr_id, creator))
+        return response
+
+    async def op_submit_receipt(self):
+        pr_id, creator = self.approved.popleft()
+        return await self.client.post(
+            self.url(f"/api/requests/{pr_id}/submit-receipt/"),
+            headers=creator,
+            files={"receipt": ("receipt.pdf", self.pdf, "application/pdf")},
+        )
+
+    def pick(self, mix):
+        name = self.rng.choices(list(mix), list(mix.values()))[0]
+        # Fall back to a read when the queue an operation consumes is empty
+        if (name == "approve" and not self.pending) or (name == "submit_receipt" and not self.approved):
+            return "list"
+        return name
+
+    async def run_one(self, name):
+        started = time.perf_counter()
+        try:
+            response = await getattr(self, f"op_{name}")()
+            if response.status_code < 400:
+                self.latencies[name].append(time.perf_counter() - started)
+                return
+        except httpx.HTTPError:
+            pass
+        self.errors[name] += 1
+
+    async def run(self, mix):
+        interval = 1 / self.args.rps
+        in_flight = set()
+        started = time.perf_counter()
+        next_at = started
+        while next_at - started < self.args.duration:
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            next_at += interval
+            if len(in_flight) >= self.args.max_in_flight:
+                self.dropped += 1
+                continue
+            task = asyncio.create_task(self.run_one(self.pick(mix)))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        await asyncio.gather(*in_flight)
+        return time.perf_counter() - started
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, weight = part.split('=')
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - {"login", "list", "create", "approve", "submit_receipt"}
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown operations: {', '.join(sorted(unknown))}")
+    return mix
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        workload = Workload(client, args)
+        await workload.setup()
+        elapsed = await workload.run(args.mix)
+
+    print(f"target {args.rps} rps for {args.duration}s, dropped {workload.dropped} arrivals at --max-in-flight")
+    all_latencies, all_errors = [], 0
+    for name in args.mix:
+        report(name, workload.latencies[name], workload.errors[name], elapsed)
+        all_latencies += workload.latencies[name]
+        all_errors += workload.errors[name]
+    report("total", all_latencies, all_errors, elapsed)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:9000')
+    parser.add_argument('--rps', type=float, default=20, help='Target arrival rate')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to generate load for')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f'Operation weights (default {DEFAULT_MIX})')
+    parser.add_argument('--prefix', default='seed', help='Username prefix used by manage.py seed')
+    parser.add_argument('--password', default='password')
+    parser.add_argument('--staff-logins', type=int, default=10, help='Seeded staff users to log in')
+    parser.add_argument('--manager-logins', type=int, default=2, help='Seeded managers to log in')
+    parser.add_argument('--max-in-flight', type=int, default=200, help='Arrivals beyond this many open requests are dropped')
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--random-seed', type=int, default=None)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,83 @@
+"""
+OpenAI-compatible stub for load tests.
+
+Answers POST /v1/chat/completions with a canned JSON payload after a
+configurable delay, so the API can be exercised without OpenAI costs or
+rate limits. Point the backend at it with
+
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://localhost:8099/v1
+
+Usage: python loadtest/stub_llm.py [--port 8099] [--latency 1.5]
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PO_DATA = {
+    "vendor": {"name": "Stub Supplies Ltd", "address": "1 Test Road", "contact": "stub@example.com"},
+    "items": [{"description": "Widget", "quantity": "2", "unit_price": "50.00", "total": "100.00"}],
+    "pricing": {"subtotal": "100.00", "tax": "0.00", "shipping": "0.00", "total": "100.00"},
+    "terms": {"payment": "Net 30", "delivery": "2 weeks", "validity": "30 days"},
+    "notes": "N/A",
+}
+
+VALIDATION = {
+    "is_valid": True,
+    "confidence_score": 90,
+    "discrepancies": [],
+    "extracted_data": {"vendor": "Stub Supplies Ltd", "total_amount": "100.00", "items": ["Widget"]},
+    "summary": "Stub validation",
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 1.0
+    jitter = 0.2
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        prompt = " ".join(m.get("content", "") for m in body.get("messages", []))
+        content = VALIDATION if "auditor" in prompt else PO_DATA
+
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+        payload = json.dumps({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(content)},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 120, "total_tokens": len(prompt) // 4 + 120},
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=1.0, help='Seconds to wait before answering')
+    parser.add_argument('--jitter', type=float, default=0.2)
+    args = parser.parse_args()
+
+    StubHandler.latency, StubHandler.jitter = args.latency, args.jitter
+    server = ThreadingHTTPServer(('0.0.0.0', args.port), StubHandler)
+    server.daemon_threads = True
+    print(f"Stub LLM listening on :{args.port} (latency {args.latency}s)")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
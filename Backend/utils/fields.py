@@ -1,15 +1,15 @@
 from accounts.models import User, Manager, StaffMember, FinanceOfficer
+from accounts.profiles import get_role_profile
 from rest_framework import serializers
 
 class CurrentStaffMemberDefault:
     requires_context = True
     
     def __call__(self, serializer_field):
-        try:
-            return StaffMember.objects.get(
-                user__username=serializer_field.context['request'].user)
-        except StaffMember.DoesNotExist:
+        profile = get_role_profile(serializer_field.context['request'], StaffMember)
+        if profile is None:
             raise serializers.ValidationError("StaffMember does not exist for the current user.")
+        return profile
         
     
 
@@ -17,15 +17,16 @@ class CurrentManagerDefault:
     requires_context = True
     
     def __call__(self, serializer_field):
-        try:
-            return Manager.objects.get(
-                user=serializer_field.context['request'].user)
-        except Manager.DoesNotExist:
+        profile = get_role_profile(serializer_field.context['request'], Manager)
+        if profile is None:
             raise serializers.ValidationError("Manager does not exist for the current user.")
+        return profile
         
 class CurrentFinanceOfficerDefault:
     requires_context = True
     
     def __call__(self, serializer_field):
-        return FinanceOfficer.objects.get(
-            user__username=serializer_field.context['request'].user)
\ No newline at end of file
+        profile = get_role_profile(serializer_field.context['request'], FinanceOfficer)
+        if profile is None:
+            raise serializers.ValidationError("FinanceOfficer does not exist for the current user.")
+        return profile